@@ -1 +0,0 @@
-# Package initializer for app
@@ -0,0 +1,10 @@
+-- SQL script to group conversation turns by the client's session id
+-- Each turn is stored as its own conversation_sessions row (fresh id per turn);
+-- session_id carries the id the client reuses across turns
+
+ALTER TABLE public.conversation_sessions
+    ADD COLUMN IF NOT EXISTS session_id uuid;
+
+-- Memory lookups fetch the latest turn of a session
+CREATE INDEX IF NOT EXISTS conversation_sessions_session_id_created_at_idx
+    ON public.conversation_sessions (session_id, created_at DESC);
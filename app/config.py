@@ -10,6 +10,14 @@ load_dotenv(find_dotenv(), override=False)
 class Settings:
     APP_NAME: str = "Sophia Voice Backend"
     API_RATE_LIMIT: str = os.getenv("API_RATE_LIMIT", "30/minute")
+    RATE_LIMIT_STORAGE_URI: str = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+    # Largest accepted audio upload (bytes)
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+
+    # Worker threads for blocking storage uploads / audio emotion calls
+    UPLOAD_POOL_SIZE: int = int(os.getenv("UPLOAD_POOL_SIZE", "16"))
+    EMOTION_POOL_SIZE: int = int(os.getenv("EMOTION_POOL_SIZE", "16"))
 
     # Auth
     API_KEYS: list[str] = [k.strip() for k in os.getenv("API_KEYS", "").split(",") if k.strip()]
@@ -20,7 +28,32 @@ class Settings:
     OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
     ANTHROPIC_API_KEY: str | None = os.getenv("ANTHROPIC_API_KEY")
     GOOGLE_API_KEY: str | None = os.getenv("GOOGLE_API_KEY")
+    VOXTRAL_MODEL: str = os.getenv("VOXTRAL_MODEL", "voxtral-mini-latest")
+    # Long clips are split at pauses into segments of about this length and
+    # transcribed concurrently; 0 always sends the whole clip
+    STT_SEGMENT_SECONDS: int = int(os.getenv("STT_SEGMENT_SECONDS", "30"))
+    STT_MAX_PARALLEL: int = int(os.getenv("STT_MAX_PARALLEL", "4"))
+    # Worker processes for the CPU-bound pause detection behind that split
+    SPLIT_POOL_SIZE: int = int(os.getenv("SPLIT_POOL_SIZE", "2"))
     
+    # RAG encoder: "torch" (default) or "onnx" (ONNX Runtime, INT8 AVX512-VNNI export)
+    RAG_ENCODER_BACKEND: str = os.getenv("RAG_ENCODER_BACKEND", "torch").lower()
+    # RAG encoder: dynamic INT8 quantization of the MiniLM Linear layers (CPU, torch backend)
+    RAG_QUANTIZE_INT8: bool = os.getenv("RAG_QUANTIZE_INT8", "true").lower() not in {"0", "false", "no"}
+
+    # RAG: directory for the persisted FAQ embedding matrix
+    RAG_CACHE_DIR: str = os.getenv("RAG_CACHE_DIR", "~/.cache/sophia")
+
+    # In-process LLM reply / TTS audio caches
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    RESPONSE_CACHE_TTL_S: float = float(os.getenv("RESPONSE_CACHE_TTL_S", "3600"))
+    # Cosine threshold for reusing a reply to a similar prompt; 0 disables the semantic tier
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+    # Share of /chat replies whose emotion is still classified from the TTS audio
+    # (drift check) when the LLM already reported its tone
+    SOPHIA_AUDIO_EMOTION_SAMPLE_RATE: float = float(os.getenv("SOPHIA_AUDIO_EMOTION_SAMPLE_RATE", "0.01"))
+
     # Redis for memory caching
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
@@ -35,9 +68,13 @@ class Settings:
     # Optional: direct Postgres via Transaction Pooler
     SUPABASE_DB_DSN: str | None = os.getenv("SUPABASE_DB_DSN")
 
-    # OpenTelemetry (OTLP HTTP exporter)
+    # OpenTelemetry (OTLP exporter; "http/protobuf" or "grpc")
     OTEL_EXPORTER_OTLP_ENDPOINT: str | None = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
     OTEL_EXPORTER_OTLP_HEADERS: str | None = os.getenv("OTEL_EXPORTER_OTLP_HEADERS")
+    OTEL_EXPORTER_OTLP_PROTOCOL: str = os.getenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf").lower()
+    # Fraction of new traces to record (child spans follow their parent's decision).
+    # Defaults to tracing everything, as before sampling was configurable.
+    OTEL_TRACES_SAMPLE_RATIO: float = float(os.getenv("OTEL_TRACES_SAMPLE_RATIO", "1.0"))
 
 
 @lru_cache(maxsize=1)
@@ -4,7 +4,8 @@ from slowapi.util import get_remote_address
 from app.config import get_settings
 from app.services.supabase import has_user_consent
 
-limiter = Limiter(key_func=get_remote_address)
+# Use a shared store (e.g. redis://host:6379) so limits hold across uvicorn workers
+limiter = Limiter(key_func=get_remote_address, storage_uri=get_settings().RATE_LIMIT_STORAGE_URI)
 
 
 def verify_api_key(authorization: str | None = Header(default=None)) -> None:
@@ -11,9 +11,9 @@ from langchain.schema import BaseMessage, HumanMessage, AIMessage
 from app.services.mistral import transcribe_audio_with_voxtral, generate_llm_reply, stream_generate_reply_from_audio
 from app.services.emotion import analyze_emotion_audio
 from app.services.tts import synthesize_inworld
-from app.services.supabase import upload_audio_and_get_url, get_supabase
+from app.services.supabase import audio_file_name, upload_audio_and_get_url, get_supabase
 from app.services.memory import memory_manager, ConversationTurn
-from app.services.rag import rag_system
+from app.services.rag import get_rag_system
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -126,6 +126,23 @@ class IntentAnalyzer:
         else:
             return "small_talk"
 
+def _assemble_prompt(transcript: str, user_emotion: EmotionData, context: str, rag_context: str) -> str:
+    """Build the user turn, most stable parts first.
+
+    The system prompt is static; session memory changes only between turns and
+    the emotion estimate changes on every call, so ordering memory -> knowledge
+    -> emotion -> question keeps the longest byte-identical prefix for
+    provider-side prompt caching.
+    """
+    prompt_parts = []
+    if context:
+        prompt_parts.append(f"Conversation context: {context}")
+    if rag_context:
+        prompt_parts.append(f"Relevant knowledge base:\n{rag_context}")
+    prompt_parts.append(f"The user seems {user_emotion.label} (confidence: {user_emotion.confidence:.2f}).")
+    prompt_parts.append(f"User question: {transcript}")
+    return " | ".join(prompt_parts)
+
 class ResponseGenerator:
     """Decides what to say and how to say it"""
     
@@ -180,7 +197,7 @@ class ResponseGenerator:
         # Get RAG context for DeFi questions
         rag_context = ""
         if intent == "defi_question":
-            rag_context = rag_system.get_context_for_llm(transcript)
+            rag_context = get_rag_system().get_context_for_llm(transcript)
             logger.info(f"RAG context retrieved: {len(rag_context)} characters")
         
         # Enhanced prompt based on intent and emotion
@@ -191,20 +208,13 @@ class ResponseGenerator:
         else:
             system_prompt = "You are Sophia, a friendly AI assistant. Engage in casual conversation. Keep responses under 50 words."
         
-        # Build comprehensive prompt
-        prompt_parts = [f"The user seems {user_emotion.label} (confidence: {user_emotion.confidence:.2f})."]
-        
-        if context:
-            prompt_parts.append(f"Conversation context: {context}")
-        
-        if rag_context:
-            prompt_parts.append(f"Relevant knowledge base:\n{rag_context}")
+        full_prompt = _assemble_prompt(transcript, user_emotion, context, rag_context)
         
-        prompt_parts.append(f"User question: {transcript}")
-        
-        full_prompt = " | ".join(prompt_parts)
-        
-        return generate_llm_reply(full_prompt)
+        return generate_llm_reply(
+            full_prompt,
+            cache_query=transcript,
+            cache_context=f"{intent}|{user_emotion.label}|{context}",
+        )
     
     def _claude_fallback(self, transcript: str, intent: str) -> str:
         """Fallback to Claude-3 if Mistral fails"""
@@ -244,7 +254,7 @@ class TTSNode:
             tts_bytes = synthesize_inworld(state["llm_response"])
             
             # Upload and get URL
-            file_name = f"sophia_{int(time.time()*1000)}_{state['session_id']}.mp3"
+            file_name = audio_file_name(f"sophia_{state['session_id']}")
             audio_url = upload_audio_and_get_url(file_bytes=tts_bytes, file_name=file_name)
             
             # Analyze Sophia's emotion from TTS output
@@ -266,7 +276,7 @@ class TTSNode:
             state["fallback_used"]["tts"] = "boson_fallback"
             try:
                 tts_bytes = self._boson_ai_fallback(state["llm_response"])
-                file_name = f"sophia_fallback_{int(time.time()*1000)}_{state['session_id']}.mp3"
+                file_name = audio_file_name(f"sophia_fallback_{state['session_id']}")
                 audio_url = upload_audio_and_get_url(file_bytes=tts_bytes, file_name=file_name)
                 sophia_emotion = analyze_emotion_audio(tts_bytes)
                 
@@ -355,6 +365,7 @@ class SophiaLangGraph:
     
     def __init__(self):
         self.graph = self._build_graph()
+        self.text_graph = self._build_text_graph()
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph state machine"""
@@ -386,6 +397,33 @@ class SophiaLangGraph:
         
         return workflow.compile()
     
+    def _build_text_graph(self) -> StateGraph:
+        """Build the text-input graph: same pipeline minus the audio ingestor (no STT/audio emotion)"""
+        
+        # Create a text-specific graph that skips audio processing
+        text_workflow = StateGraph(GraphState)
+        
+        # Initialize nodes
+        intent_analyzer = IntentAnalyzer()
+        response_generator = ResponseGenerator()
+        tts_node = TTSNode()
+        eval_logger = EvalLogger()
+        
+        # Add nodes (skip audio_ingestor for text input)
+        text_workflow.add_node("intent_analyzer", intent_analyzer)
+        text_workflow.add_node("response_generator", response_generator)
+        text_workflow.add_node("tts_node", tts_node)
+        text_workflow.add_node("eval_logger", eval_logger)
+        
+        # Define edges (workflow sequence without audio processing)
+        text_workflow.add_edge(START, "intent_analyzer")
+        text_workflow.add_edge("intent_analyzer", "response_generator")
+        text_workflow.add_edge("response_generator", "tts_node")
+        text_workflow.add_edge("tts_node", "eval_logger")
+        text_workflow.add_edge("eval_logger", END)
+        
+        return text_workflow.compile()
+    
     def process_conversation(self, audio_bytes: bytes, session_id: Optional[str] = None) -> GraphState:
         """Process a complete conversation turn through the graph"""
         
@@ -441,31 +479,7 @@ class SophiaLangGraph:
         
         logger.info(f"Starting LangGraph text processing for session {session_id} with message: '{message[:50]}...'")
         
-        # Create a text-specific graph that skips audio processing
-        text_workflow = StateGraph(GraphState)
-        
-        # Initialize nodes
-        intent_analyzer = IntentAnalyzer()
-        response_generator = ResponseGenerator()
-        tts_node = TTSNode()
-        eval_logger = EvalLogger()
-        
-        # Add nodes (skip audio_ingestor for text input)
-        text_workflow.add_node("intent_analyzer", intent_analyzer)
-        text_workflow.add_node("response_generator", response_generator)
-        text_workflow.add_node("tts_node", tts_node)
-        text_workflow.add_node("eval_logger", eval_logger)
-        
-        # Define edges (workflow sequence without audio processing)
-        text_workflow.add_edge(START, "intent_analyzer")
-        text_workflow.add_edge("intent_analyzer", "response_generator")
-        text_workflow.add_edge("response_generator", "tts_node")
-        text_workflow.add_edge("tts_node", "eval_logger")
-        text_workflow.add_edge("eval_logger", END)
-        
-        # Compile and execute the text-specific graph
-        text_graph = text_workflow.compile()
-        final_state = text_graph.invoke(initial_state)
+        final_state = self.text_graph.invoke(initial_state)
         
         logger.info(f"LangGraph text processing completed for session {session_id}")
         
@@ -516,21 +530,10 @@ class SophiaLangGraph:
             # Get RAG context for DeFi questions
             rag_context = ""
             if state["intent"] == "defi_question":
-                rag_context = rag_system.get_context_for_llm(state["transcript"])
+                rag_context = get_rag_system().get_context_for_llm(state["transcript"])
                 logger.info(f"RAG context retrieved: {len(rag_context)} characters")
             
-            # Build comprehensive prompt
-            prompt_parts = [f"The user seems {state['user_emotion'].label} (confidence: {state['user_emotion'].confidence:.2f})."]
-            
-            if context:
-                prompt_parts.append(f"Conversation context: {context}")
-            
-            if rag_context:
-                prompt_parts.append(f"Relevant knowledge base:\n{rag_context}")
-            
-            prompt_parts.append(f"User question: {state['transcript']}")
-            
-            full_prompt = " | ".join(prompt_parts)
+            full_prompt = _assemble_prompt(state["transcript"], state["user_emotion"], context, rag_context)
             
             # Stream response using Voxtral - note: Voxtral streaming doesn't use custom prompts
             # We'll need to use the transcript and generate with context instead
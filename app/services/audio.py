@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import io
+import threading
+import wave
+from collections import OrderedDict
+from typing import List, Optional
+
+try:
+    from pydub import AudioSegment
+    from pydub.silence import detect_silence
+except Exception:  # pragma: no cover - optional dependency
+    AudioSegment = None  # type: ignore
+    detect_silence = None  # type: ignore
+
+# Pauses shorter than this are treated as part of speech
+_MIN_PAUSE_MS = 300
+
+
+# Encodings of the last few clips, keyed by digest so the cache never pins
+# the (up to MAX_UPLOAD_BYTES) uploads themselves
+_B64_CACHE_SIZE = 4
+_b64_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_b64_lock = threading.Lock()
+
+
+def audio_digest(audio: bytes) -> bytes:
+    """sha256 of a clip: the one key every per-clip cache (transcript, emotion,
+    base64, upload URL) uses, so a handler can hash a clip once and pass it down."""
+    return hashlib.sha256(audio).digest()
+
+
+def audio_b64(audio: bytes, digest: Optional[bytes] = None) -> str:
+    """Base64 text of an audio clip, shared by every provider call that inlines it.
+
+    A single user clip is inlined by Voxtral audio chat, the Gemini fallbacks and
+    the emotion classifier; encoding it once avoids a full-size copy per call.
+    """
+    key = digest or audio_digest(audio)
+    with _b64_lock:
+        encoded = _b64_cache.get(key)
+        if encoded is not None:
+            _b64_cache.move_to_end(key)
+            return encoded
+    encoded = base64.b64encode(audio).decode("ascii")
+    with _b64_lock:
+        _b64_cache[key] = encoded
+        while len(_b64_cache) > _B64_CACHE_SIZE:
+            _b64_cache.popitem(last=False)
+    return encoded
+
+
+def wav_duration_s(audio: bytes) -> Optional[float]:
+    """Duration of a PCM WAV clip from its header alone; None for anything else."""
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None
+    try:
+        with wave.open(io.BytesIO(audio)) as wav:
+            frames, rate = wav.getnframes(), wav.getframerate()
+    except (wave.Error, EOFError):
+        return None
+    # Streamed recorders may leave the size fields zeroed until the end
+    return frames / rate if frames and rate else None
+
+
+def split_on_pauses(audio: bytes, segment_ms: int) -> List[bytes]:
+    """Split a clip into roughly ``segment_ms`` WAV segments, cutting at pauses.
+
+    Each cut goes at the pause nearest its target (within a third of a segment)
+    so words aren't split and transcripts can simply be joined. Returns
+    ``[audio]`` unchanged for short or undecodable clips, or without pydub.
+    """
+    if AudioSegment is None:
+        return [audio]
+    try:
+        clip = AudioSegment.from_file(io.BytesIO(audio))
+    except Exception:
+        return [audio]
+    if len(clip) <= segment_ms * 1.5 or clip.dBFS == float("-inf"):
+        return [audio]
+
+    pauses = [
+        (start + end) // 2
+        for start, end in detect_silence(
+            clip, min_silence_len=_MIN_PAUSE_MS, silence_thresh=clip.dBFS - 16, seek_step=10
+        )
+    ]
+    cuts = [0]
+    while len(clip) - cuts[-1] > segment_ms * 1.5:
+        target = cuts[-1] + segment_ms
+        nearby = [p for p in pauses if abs(p - target) <= segment_ms // 3]
+        cuts.append(min(nearby, key=lambda p: abs(p - target)) if nearby else target)
+    cuts.append(len(clip))
+
+    segments = []
+    for start, end in zip(cuts, cuts[1:]):
+        buf = io.BytesIO()
+        clip[start:end].export(buf, format="wav")
+        segments.append(buf.getvalue())
+    return segments
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl_s`` seconds."""
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class SemanticCache:
+    """Nearest-neighbour cache over L2-normalized text embeddings.
+
+    A lookup returns the value stored for the most similar previous key when
+    the cosine similarity reaches ``threshold``. Entries are evicted FIFO.
+    """
+
+    def __init__(self, encode: Callable[[str], np.ndarray], maxsize: int, ttl_s: float, threshold: float):
+        self._encode = encode
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Tuple[float, Any]] = []
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> Optional[Any]:
+        with self._lock:
+            if self._vectors is None or not self._entries:
+                return None
+            vectors, entries = self._vectors, list(self._entries)
+        # Expired rows can't win, so a live runner-up is still found
+        now = time.monotonic()
+        live = np.fromiter((expires_at >= now for expires_at, _ in entries), dtype=bool, count=len(entries))
+        if not live.any():
+            return None
+        sims = np.where(live, vectors @ self._encode(text), -np.inf)
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+        return entries[best][1]
+
+    def put(self, text: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        vec = np.asarray(self._encode(text), dtype=np.float32)[None, :]
+        with self._lock:
+            vectors = vec if self._vectors is None else np.vstack([self._vectors, vec])
+            entries = self._entries + [(time.monotonic() + self.ttl_s, value)]
+            if len(entries) > self.maxsize:
+                vectors, entries = vectors[-self.maxsize:], entries[-self.maxsize:]
+            self._vectors, self._entries = vectors, entries
+
+
+class SingleFlight:
+    """Coalesce concurrent async calls for the same key into one execution.
+
+    Callers that arrive while a call for their key is in flight await its
+    result instead of issuing a duplicate request. A caller being cancelled
+    doesn't cancel the shared call. Calls are only shared within one event
+    loop, since a task can't be awaited from another.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, Hashable], "asyncio.Future[Any]"] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        slot = (id(asyncio.get_running_loop()), key)
+        pending = self._pending.get(slot)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        task = asyncio.ensure_future(fn())
+        self._pending[slot] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._pending.get(slot) is task:
+                del self._pending[slot]
@@ -1,44 +1,90 @@
 import contextlib
-from typing import Any, Dict
+import functools
+from typing import Any, Dict, Iterable
 import psycopg
 
 from app.config import get_settings
 
+try:
+    from psycopg_pool import ConnectionPool  # type: ignore
+except Exception:
+    ConnectionPool = None  # type: ignore
 
-def _get_conn():
+
+_CONVERSATION_SESSION_COLS = [
+    "id",
+    "session_id",
+    "user_id",
+    "transcript",
+    "reply",
+    "user_emotion_label",
+    "user_emotion_confidence",
+    "sophia_emotion_label",
+    "sophia_emotion_confidence",
+    "audio_url",
+]
+
+_EMOTION_SCORE_SQL = (
+    "insert into public.emotion_scores (session_id, role, label, confidence, user_id) "
+    "values (%(session_id)s, %(role)s, %(label)s, %(confidence)s, %(user_id)s)"
+)
+
+
+@functools.lru_cache(maxsize=4)
+def _conversation_session_sql(cols: tuple) -> str:
+    return (
+        "insert into public.conversation_sessions (" + ",".join(cols) + ") values ("
+        + ",".join([f"%({c})s" for c in cols]) + ")"
+        # Row ids are generated per turn when queued, so a conflict can only be a
+        # retry of a write that already landed
+        " on conflict (id) do nothing"
+    )
+
+
+def _conversation_session_cols(row: Dict[str, Any]) -> tuple:
+    # session_id is left out when the caller dropped it (column not migrated yet)
+    return tuple(c for c in _CONVERSATION_SESSION_COLS if c != "session_id" or c in row)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pool(dsn: str):
+    # Keep connections (TLS + auth) alive across inserts instead of reconnecting per row
+    return ConnectionPool(dsn, min_size=1, max_size=8, kwargs={"autocommit": True})
+
+
+@contextlib.contextmanager
+def _connection():
     settings = get_settings()
     if not settings.SUPABASE_DB_DSN:
         raise RuntimeError("SUPABASE_DB_DSN not configured")
-    return psycopg.connect(settings.SUPABASE_DB_DSN)
+    if ConnectionPool is not None:
+        with _get_pool(settings.SUPABASE_DB_DSN).connection() as conn:
+            yield conn
+        return
+    with contextlib.closing(psycopg.connect(settings.SUPABASE_DB_DSN, autocommit=True)) as conn:
+        yield conn
+
+
+def _execute_many(sql: str, rows: Iterable[Dict[str, Any]]) -> None:
+    with _connection() as conn:
+        # One transaction per batch so a failed bulk write leaves nothing behind
+        with conn.transaction(), conn.cursor() as cur:
+            cur.executemany(sql, list(rows))
 
 
 def insert_emotion_score_sql(payload: Dict[str, Any]) -> None:
-    sql = (
-        "insert into public.emotion_scores (session_id, role, label, confidence, user_id) "
-        "values (%(session_id)s, %(role)s, %(label)s, %(confidence)s, %(user_id)s)"
-    )
-    with contextlib.closing(_get_conn()) as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, payload)
-            conn.commit()
+    _execute_many(_EMOTION_SCORE_SQL, [payload])
+
+
+def insert_emotion_scores_sql(payloads: Iterable[Dict[str, Any]]) -> None:
+    _execute_many(_EMOTION_SCORE_SQL, payloads)
 
 
 def insert_conversation_session_sql(data: Dict[str, Any]) -> None:
-    cols = [
-        "id",
-        "user_id",
-        "transcript",
-        "reply",
-        "user_emotion_label",
-        "user_emotion_confidence",
-        "sophia_emotion_label",
-        "sophia_emotion_confidence",
-        "audio_url",
-    ]
-    sql = (
-        "insert into public.conversation_sessions (" + ",".join(cols) + ") values (" + ",".join([f"%({c})s" for c in cols]) + ")"
-    )
-    with contextlib.closing(_get_conn()) as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, data)
-            conn.commit()
+    _execute_many(_conversation_session_sql(_conversation_session_cols(data)), [data])
+
+
+def insert_conversation_sessions_sql(rows: Iterable[Dict[str, Any]]) -> None:
+    rows = list(rows)
+    if rows:
+        _execute_many(_conversation_session_sql(_conversation_session_cols(rows[0])), rows)
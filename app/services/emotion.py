@@ -1,6 +1,9 @@
+import functools
 import logging
 from pydantic import BaseModel
 from app.config import get_settings
+from app.services.audio import audio_b64 as encode_audio_b64, audio_digest
+from app.services.cache import TTLCache
 
 logger = logging.getLogger("emotion")
 
@@ -108,9 +111,82 @@ def analyze_emotion_text(text: str) -> Emotion:
     return result
 
 
-def analyze_emotion_audio(wav_bytes: bytes) -> Emotion:
+def warmup() -> None:
+    """Import the Phoenix/pandas stack and build the audio classifier ahead of time."""
+    try:
+        import pandas  # noqa: F401
+        from phoenix.evals import llm_classify  # noqa: F401
+        _audio_classifier()
+    except Exception as e:
+        logger.info(f"Emotion warmup skipped: {e}")
+
+
+# Successful audio classifications keyed by a digest of the clip. TTS replies
+# are themselves cached per text, so repeated replies hit here too.
+_audio_emotion_cache = TTLCache(maxsize=512, ttl_s=get_settings().RESPONSE_CACHE_TTL_S)
+
+
+# Emotion rails (categories) for audio classification
+_EMOTION_RAILS = [
+    "anger", "happiness", "excitement", "sadness", "neutral",
+    "frustration", "fear", "surprise", "disgust", "other"
+]
+
+# Map emotion labels to database-allowed values (positive, neutral, negative)
+# This is required by the database check constraint
+_EMOTION_TO_DB_LABEL = {
+    "happiness": "positive",
+    "excitement": "positive",
+    "surprise": "positive",
+    "neutral": "neutral",
+    "anger": "negative",
+    "sadness": "negative",
+    "frustration": "negative",
+    "fear": "negative",
+    "disgust": "negative",
+    "other": "neutral"
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _audio_classifier():
+    """Gemini model and classification template, built once per process.
+
+    Constructing GoogleGenAIModel creates an API client; reusing it keeps its
+    connection pool warm across calls instead of rebuilding both per clip.
+    """
+    from phoenix.evals import GoogleGenAIModel
+    from phoenix.evals.templates import ClassificationTemplate, PromptPartContentType, PromptPartTemplate
+
+    emotion_template = ClassificationTemplate(
+        rails=_EMOTION_RAILS,
+        template=[
+            PromptPartTemplate(
+                content_type=PromptPartContentType.TEXT,
+                template=(
+                    "You are an AI system designed to classify emotions in audio files.\n"
+                    "Analyze the provided audio and classify the primary emotion based on tone, pitch, pace, volume, and intensity.\n"
+                    f"Valid emotions: {_EMOTION_RAILS}\n"
+                    "Return ONLY one word from the list."
+                ),
+            ),
+            PromptPartTemplate(
+                content_type=PromptPartContentType.AUDIO,
+                template="{audio}",
+            ),
+            PromptPartTemplate(
+                content_type=PromptPartContentType.TEXT,
+                template="Your response must be exactly one word from the valid emotions list.",
+            ),
+        ],
+    )
+    return GoogleGenAIModel(model="gemini-2.5-flash"), emotion_template
+
+
+def analyze_emotion_audio(wav_bytes: bytes, digest: bytes | None = None) -> Emotion:
     """Classify emotion from audio using Phoenix Evals + Google Gemini.
     Requires GOOGLE_API_KEY in environment. Returns an Emotion model.
+    ``digest`` is the clip's ``audio_digest`` when the caller already has it.
     
     Note: The database has a check constraint requiring emotion labels to be
     one of: positive, neutral, negative
@@ -122,90 +198,42 @@ def analyze_emotion_audio(wav_bytes: bytes) -> Emotion:
     except Exception:
         return Emotion(label="neutral", confidence=0.5)
     
+    cache_key = digest or audio_digest(wav_bytes)
+    cached = _audio_emotion_cache.get(cache_key)
+    if cached is not None:
+        return cached.model_copy()
+    
     try:
-        import base64
         import pandas as pd
         from phoenix.evals import llm_classify
         try:
-            from phoenix.evals import GoogleGenAIModel
-            from phoenix.evals.templates import ClassificationTemplate, PromptPartContentType, PromptPartTemplate
+            model, emotion_template = _audio_classifier()
         except Exception as e:
             logger.info(f"Phoenix GoogleGenAIModel unavailable; returning neutral for audio classify: {e}")
             return Emotion(label="neutral", confidence=0.5)
-        
-        # Define emotion rails (categories)
-        EMOTION_RAILS = [
-            "anger", "happiness", "excitement", "sadness", "neutral",
-            "frustration", "fear", "surprise", "disgust", "other"
-        ]
-        
-        # Create improved emotion template
-        emotion_template = ClassificationTemplate(
-            rails=EMOTION_RAILS,
-            template=[
-                PromptPartTemplate(
-                    content_type=PromptPartContentType.TEXT,
-                    template=(
-                        "You are an AI system designed to classify emotions in audio files.\n"
-                        "Analyze the provided audio and classify the primary emotion based on tone, pitch, pace, volume, and intensity.\n"
-                        f"Valid emotions: {EMOTION_RAILS}\n"
-                        "Return ONLY one word from the list."
-                    ),
-                ),
-                PromptPartTemplate(
-                    content_type=PromptPartContentType.AUDIO,
-                    template="{audio}",
-                ),
-                PromptPartTemplate(
-                    content_type=PromptPartContentType.TEXT,
-                    template="Your response must be exactly one word from the valid emotions list.",
-                ),
-            ],
-        )
 
         # 1) encode audio to base64
-        audio_b64 = base64.b64encode(wav_bytes).decode("utf-8")
+        audio_b64 = encode_audio_b64(wav_bytes, cache_key)
 
         # 2) dataframe with expected column name 'audio'
         df = pd.DataFrame([{"audio": audio_b64}])
 
-        # 3) model: gemini
-        model = GoogleGenAIModel(model="gemini-2.5-flash")
-
-        # 4) run classification with improved template
+        # 3) run classification with the shared Gemini model and template
         results = llm_classify(
             model=model,
             data=df,
             template=emotion_template,
-            rails=EMOTION_RAILS,
+            rails=_EMOTION_RAILS,
         )
 
-        # 5) extract single label
+        # 4) extract single label and map it to the database-allowed values
         label = str(results.iloc[0, 0]).strip().lower()
-        valid = [r.lower() for r in EMOTION_RAILS]
-        if label not in valid:
-            label = "neutral"
-            
-        # Map emotion labels to database-allowed values (positive, neutral, negative)
-        # This is required by the database check constraint
-        emotion_mapping = {
-            "happiness": "positive",
-            "excitement": "positive",
-            "surprise": "positive",
-            "neutral": "neutral",
-            "anger": "negative",
-            "sadness": "negative",
-            "frustration": "negative",
-            "fear": "negative",
-            "disgust": "negative",
-            "other": "neutral"
-        }
-        
-        # Map to allowed database values
-        db_label = emotion_mapping.get(label, "neutral")
+        db_label = _EMOTION_TO_DB_LABEL.get(label, "neutral")
         
         # Confidence not provided by default template; set midpoint
-        return Emotion(label=db_label, confidence=0.8)  # Higher confidence with improved template
+        emotion = Emotion(label=db_label, confidence=0.8)  # Higher confidence with improved template
+        _audio_emotion_cache.put(cache_key, emotion)
+        return emotion.model_copy()
     except Exception as e:
         logger.warning(f"Audio emotion classification failed: {e}")
         return Emotion(label="neutral", confidence=0.5)
@@ -65,7 +65,15 @@ class MemoryManager:
         
         # Fallback to Supabase
         try:
-            result = self.supabase.table("conversation_sessions").select("*").eq("id", session_id).execute()
+            # One row per turn; the latest turn of the session seeds the memory
+            result = (
+                self.supabase.table("conversation_sessions")
+                .select("*")
+                .eq("session_id", session_id)
+                .order("created_at", desc=True)
+                .limit(1)
+                .execute()
+            )
             if result.data:
                 session_data = result.data[0]
                 return self._build_memory_from_session(session_data)
@@ -174,7 +182,7 @@ class MemoryManager:
         )
         
         return SessionMemory(
-            session_id=session_data["id"],
+            session_id=session_data.get("session_id") or session_data["id"],
             turns=[turn],
             topics=[],
             user_tone_history=[turn.user_emotion],
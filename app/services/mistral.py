@@ -1,93 +1,382 @@
-import base64
-import io
+import asyncio
+import functools
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List
+import httpx
+import mistralai
+import orjson
 from mistralai import Mistral
 from app.config import get_settings
+from app.services.audio import audio_b64, audio_digest, split_on_pauses, wav_duration_s
+from app.services.cache import SemanticCache, SingleFlight, TTLCache
 import logging
 logger = logging.getLogger("sophia-backend")
 
 
+def _use_orjson_in_sdk() -> None:
+    """Route the Mistral SDK's request/stream JSON through orjson when installed.
+
+    The SDK (mistralai 1.9.x) encodes request bodies (including base64 audio)
+    with stdlib ``json.dumps`` in ``utils.serializers`` and re-encodes every SSE
+    event in ``utils.eventstreaming``. Response bodies already go through
+    pydantic_core, so only those two module bindings are swapped. These are
+    private SDK internals (mistralai is pinned in requirements.txt), so the
+    swap is skipped, with a log line, unless both still bind stdlib json.
+    """
+    try:
+        import json
+        import orjson
+        from mistralai.utils import eventstreaming, serializers
+    except Exception as e:
+        logger.info(f"Mistral SDK JSON left on stdlib json: {e}")
+        return
+    if not mistralai.__version__.startswith("1.9.") or not all(
+        getattr(mod, "json", None) is json for mod in (serializers, eventstreaming)
+    ):
+        logger.info(
+            f"Mistral SDK JSON left on stdlib json: mistralai {mistralai.__version__} "
+            "internals differ from the 1.9.x layout this swap targets"
+        )
+        return
+
+    class _OrjsonCompat:
+        # orjson output is already compact, matching separators=(",", ":")
+        @staticmethod
+        def dumps(obj, **_kwargs) -> str:
+            return orjson.dumps(obj).decode("utf-8")
+
+        loads = staticmethod(orjson.loads)
+
+    serializers.json = _OrjsonCompat
+    eventstreaming.json = _OrjsonCompat
+
+
+_use_orjson_in_sdk()
+
+# Prompt pieces shared by every text reply path. The persona lives in the
+# system prompt, so the user prefix stays short (fewer input tokens per turn).
+_SYSTEM_PROMPT = "You are Sophia, a concise and safe DeFi mentor. Keep replies under 50 words."
+_USER_PREFIX = "As DeFi mentor: "
+_EMPTY_INPUT_REPLY = "I didn't catch that. Could you rephrase your question about DeFi?"
+
+# Streaming deltas are merged for up to this long / this many chars per chunk
+_COALESCE_WINDOW_S = 0.02
+_COALESCE_MAX_CHARS = 64
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_client(api_key: str) -> Mistral:
+    # One client per process so its HTTP connection pool is reused across calls
+    return Mistral(api_key=api_key)
+
+
 def _client() -> Mistral:
     settings = get_settings()
     if not settings.MISTRAL_API_KEY:
         raise RuntimeError("MISTRAL_API_KEY is not set")
-    return Mistral(api_key=settings.MISTRAL_API_KEY)
+    return _shared_client(settings.MISTRAL_API_KEY)
 
 
-def transcribe_audio_with_voxtral(wav_bytes: bytes) -> str:
-    """Transcribe audio using Mistral Voxtral if available; fallback to Gemini.
-    Returns plain text transcript.
+def warmup() -> None:
+    """Open the Mistral (and Gemini) connections ahead of the first user request.
+
+    Pays the DNS + TCP + TLS handshake at startup so the first voice turn
+    reuses a hot keep-alive connection. Failures are logged and ignored.
     """
     settings = get_settings()
+    if settings.MISTRAL_API_KEY:
+        try:
+            _client().models.list()
+        except Exception:
+            logger.debug("Mistral warmup failed", exc_info=True)
+    if settings.GOOGLE_API_KEY:
+        try:
+            _gemini_model(settings.GOOGLE_API_KEY)
+        except Exception:
+            logger.debug("Gemini warmup failed", exc_info=True)
+
+
+async def warmup_async() -> None:
+    """Open the SDK's async connection pool, which request handlers use.
 
-    # Preferred: Mistral transcription endpoint (voxtral-mini-latest)
+    ``warmup`` only warms the sync transport; the async calls (STT, replies)
+    go through a separate httpx.AsyncClient inside the SDK.
+    """
+    if not get_settings().MISTRAL_API_KEY:
+        return
     try:
-        client = _client()
-        # Provide a filename; SDK inspects content
-        # Detect common audio container by magic bytes to choose a helpful filename
-        def _detect_ext(data: bytes) -> str:
-            try:
-                if not data or len(data) < 4:
-                    return ".wav"
-                b0 = data[:4]
-                if b0 == b"RIFF":
-                    return ".wav"
-                if b0[:3] == b"ID3" or (data[0] == 0xFF and (data[1] & 0xE0) == 0xE0):
-                    return ".mp3"
-                if data[:4] == b"OggS":
-                    return ".ogg"
-                # WebM/Matroska EBML header
-                if data[:4] == bytes([0x1A, 0x45, 0xDF, 0xA3]):
-                    return ".webm"
-                return ".wav"
-            except Exception:
-                return ".wav"
-        file_name = f"audio{_detect_ext(wav_bytes)}"
-        bio = io.BytesIO(wav_bytes)
-        resp = client.audio.transcriptions.complete(
-            model="voxtral-mini-latest",
-            file={
-                "content": bio,
-                "file_name": file_name,
-            },
-        )
-        # Try robust extraction from SDK response
-        # Known SDK returns may have attributes like 'text' or dict-like structures
-        text = None
-        for key in ("text", "output_text", "transcript"):
-            try:
-                val = getattr(resp, key, None)
-                if isinstance(val, str) and val.strip():
-                    text = val.strip()
-                    break
-            except Exception:
-                pass
-        if text is None:
-            try:
-                # If resp is dict-like
-                text = (resp.get("text") or resp.get("output_text") or resp.get("transcript") or "").strip()
-            except Exception:
-                text = str(resp)
-        return text
+        await _client().models.list_async()
     except Exception:
-        # Fallback: Gemini if available; otherwise empty string
-        if getattr(settings, "GOOGLE_API_KEY", None):
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=settings.GOOGLE_API_KEY)
-                model = genai.GenerativeModel("gemini-1.5-flash")
-                audio_inline = {
-                    "inline_data": {
-                        "mime_type": "audio/wav",
-                        "data": base64.b64encode(wav_bytes).decode("utf-8"),
-                    }
+        logger.debug("Mistral async warmup failed", exc_info=True)
+
+
+def _is_transient_error(exc: Exception) -> bool:
+    """Whether a Voxtral failure is worth retrying against the Gemini fallback.
+
+    Network errors, timeouts, rate limits and 5xx responses are transient;
+    auth and request errors (other 4xx) are permanent and are re-raised.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+@functools.lru_cache(maxsize=1)
+def _gemini_model(api_key: str):
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel("gemini-1.5-flash")
+
+
+def _delta_text_v1(event) -> str | None:
+    # mistralai 1.x: chat.stream yields CompletionEvent(data=CompletionChunk)
+    content = event.data.choices[0].delta.content
+    if isinstance(content, str):
+        return content
+    if content:
+        # Multi-part delta (list of ContentChunk); keep only text parts
+        return "".join(getattr(part, "text", "") or "" for part in content)
+    return None
+
+
+def _delta_text_v0(chunk) -> str | None:
+    # mistralai 0.x: chat_stream yields ChatCompletionStreamResponse directly
+    return chunk.choices[0].delta.content
+
+
+# Bind the stream chunk parser to the installed SDK once, at import
+_delta_text = _delta_text_v1 if mistralai.__version__.startswith("1.") else _delta_text_v0
+
+
+def _detect_ext(data: bytes) -> str:
+    """Detect common audio container by magic bytes to choose a helpful filename."""
+    try:
+        if not data or len(data) < 4:
+            return ".wav"
+        b0 = data[:4]
+        if b0 == b"RIFF":
+            return ".wav"
+        if b0[:3] == b"ID3" or (data[0] == 0xFF and (data[1] & 0xE0) == 0xE0):
+            return ".mp3"
+        if data[:4] == b"OggS":
+            return ".ogg"
+        # WebM/Matroska EBML header
+        if data[:4] == bytes([0x1A, 0x45, 0xDF, 0xA3]):
+            return ".webm"
+        return ".wav"
+    except Exception:
+        return ".wav"
+
+
+def _transcription_file(wav_bytes: bytes) -> dict:
+    # Provide a filename; SDK inspects content.
+    # The SDK accepts raw bytes; no need to copy into a BytesIO
+    return {"content": wav_bytes, "file_name": f"audio{_detect_ext(wav_bytes)}"}
+
+
+def _transcript_text(resp) -> str:
+    # Try robust extraction from SDK response
+    # Known SDK returns may have attributes like 'text' or dict-like structures
+    for key in ("text", "output_text", "transcript"):
+        try:
+            val = getattr(resp, key, None)
+            if isinstance(val, str) and val.strip():
+                return val.strip()
+        except Exception:
+            pass
+    try:
+        # If resp is dict-like
+        return (resp.get("text") or resp.get("output_text") or resp.get("transcript") or "").strip()
+    except Exception:
+        return str(resp)
+
+
+def _transcribe_fallback(wav_bytes: bytes, error: Exception, digest: bytes | None = None) -> str:
+    settings = get_settings()
+    # Missing Mistral config still falls through to Gemini; permanent API
+    # errors (auth, bad request) would fail the same way there, so surface them.
+    if settings.MISTRAL_API_KEY and not _is_transient_error(error):
+        raise error
+    logger.warning(f"Voxtral transcription failed; trying Gemini fallback: {error}")
+    # Fallback: Gemini if available; otherwise empty string
+    if getattr(settings, "GOOGLE_API_KEY", None):
+        try:
+            model = _gemini_model(settings.GOOGLE_API_KEY)
+            audio_inline = {
+                "inline_data": {
+                    "mime_type": "audio/wav",
+                    "data": audio_b64(wav_bytes, digest),
                 }
-                prompt = "Transcribe this audio. Return only the transcription text, no extra words."
-                gresp = model.generate_content([{"text": prompt}, audio_inline])
-                return (gresp.text or "").strip()
-            except Exception:
-                pass
-        return ""
+            }
+            prompt = "Transcribe this audio. Return only the transcription text, no extra words."
+            gresp = model.generate_content([{"text": prompt}, audio_inline])
+            return (gresp.text or "").strip()
+        except Exception:
+            pass
+    return ""
+
+
+# Voxtral transcripts keyed by the clip's sha256, so client retries and
+# re-sent recordings skip the STT round-trip. Fallback output is not cached.
+_transcript_cache = TTLCache(maxsize=256, ttl_s=get_settings().RESPONSE_CACHE_TTL_S)
+_transcriptions_in_flight = SingleFlight()
+
+
+def transcribe_audio_with_voxtral(wav_bytes: bytes, digest: bytes | None = None) -> str:
+    """Transcribe audio using Mistral Voxtral if available; fallback to Gemini.
+    Returns plain text transcript. ``digest`` is the clip's ``audio_digest``
+    when the caller already has it.
+    """
+    digest = digest or audio_digest(wav_bytes)
+    cached = _transcript_cache.get(digest)
+    if cached is not None:
+        return cached
+    # Preferred: Mistral transcription endpoint (settings.VOXTRAL_MODEL)
+    try:
+        resp = _client().audio.transcriptions.complete(
+            model=get_settings().VOXTRAL_MODEL,
+            file=_transcription_file(wav_bytes),
+        )
+        text = _transcript_text(resp)
+    except Exception as e:
+        return _transcribe_fallback(wav_bytes, e, digest)
+    if text:
+        _transcript_cache.put(digest, text)
+    return text
+
+
+async def transcribe_audio_with_voxtral_async(wav_bytes: bytes, digest: bytes | None = None) -> str:
+    """Async variant of ``transcribe_audio_with_voxtral`` for request handlers.
+
+    Uses the SDK's async transport on the shared client, so concurrent
+    requests run side by side on one connection pool instead of blocking the
+    event loop one after another. The Gemini fallback runs in a worker thread.
+    """
+    digest = digest or audio_digest(wav_bytes)
+    cached = _transcript_cache.get(digest)
+    if cached is not None:
+        return cached
+    # Identical clips in flight at once (client retries) share one Voxtral call
+    return await _transcriptions_in_flight.run(digest, lambda: _transcribe_async(wav_bytes, digest))
+
+
+async def _transcribe_async(wav_bytes: bytes, digest: bytes) -> str:
+    try:
+        resp = await _client().audio.transcriptions.complete_async(
+            model=get_settings().VOXTRAL_MODEL,
+            file=_transcription_file(wav_bytes),
+        )
+        text = _transcript_text(resp)
+    except Exception as e:
+        return await asyncio.to_thread(_transcribe_fallback, wav_bytes, e, digest)
+    if text:
+        _transcript_cache.put(digest, text)
+    return text
+
+
+# Compressed uploads (webm/ogg/mp3) carry no cheap duration, so they are gated
+# on size at the lowest byte rate a client upload can plausibly have (16 kbps,
+# under any speech codec we receive). Smaller clips are certainly too short to
+# split and skip decoding entirely.
+_MIN_AUDIO_BYTES_PER_S = 2_000
+
+
+def _segment_min_bytes(segment_seconds: int) -> int:
+    # split_on_pauses only cuts clips longer than 1.5 segments
+    return int(segment_seconds * 1.5 * _MIN_AUDIO_BYTES_PER_S)
+
+
+def _may_need_split(wav_bytes: bytes, segment_seconds: int) -> bool:
+    """Whether a clip can be long enough for ``split_on_pauses`` to cut it.
+
+    PCM WAV is judged by the duration in its header, so ordinary utterances
+    never pay for the decode in the split pool.
+    """
+    duration = wav_duration_s(wav_bytes)
+    if duration is not None:
+        return duration > segment_seconds * 1.5
+    return len(wav_bytes) >= _segment_min_bytes(segment_seconds)
+
+
+# Pause detection is pure-Python RMS over the whole clip and holds the GIL for
+# hundreds of ms on long uploads, so it runs in worker processes instead of
+# stalling every other request's threads. Workers are spawned, not forked: the
+# server already runs threads (Supabase writer, span exporter, HTTP pools)
+# whose locks a forked child could inherit held.
+_split_pool: ProcessPoolExecutor | None = None
+
+
+def _get_split_pool() -> ProcessPoolExecutor:
+    global _split_pool
+    if _split_pool is None:
+        _split_pool = ProcessPoolExecutor(
+            max_workers=max(1, get_settings().SPLIT_POOL_SIZE),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _split_pool
+
+
+async def _split_in_pool(wav_bytes: bytes, segment_ms: int) -> List[bytes]:
+    """``split_on_pauses`` in the worker pool; ``[wav_bytes]`` if the pool fails.
+
+    A crashed worker breaks the whole executor, so it is dropped and the next
+    long upload starts a fresh one.
+    """
+    global _split_pool
+    pool = _get_split_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, split_on_pauses, wav_bytes, segment_ms)
+    except BrokenProcessPool as e:
+        logger.warning(f"Audio split worker died; restarting the pool: {e}")
+        if _split_pool is pool:
+            _split_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+    except Exception as e:
+        logger.warning(f"Audio split failed; transcribing the whole clip: {e}")
+    return [wav_bytes]
+
+
+def shutdown_split_pool() -> None:
+    global _split_pool
+    if _split_pool is not None:
+        _split_pool.shutdown(wait=False, cancel_futures=True)
+        _split_pool = None
+
+
+async def transcribe_long_audio_async(wav_bytes: bytes, digest: bytes | None = None) -> str:
+    """``transcribe_audio_with_voxtral_async`` that parallelizes long clips.
+
+    Clips longer than STT_SEGMENT_SECONDS are split at pauses and the segments
+    transcribed concurrently (at most STT_MAX_PARALLEL in flight), so latency
+    tracks the slowest segment rather than the total duration.
+    """
+    settings = get_settings()
+    digest = digest or audio_digest(wav_bytes)
+    if settings.STT_SEGMENT_SECONDS <= 0 or not _may_need_split(wav_bytes, settings.STT_SEGMENT_SECONDS):
+        return await transcribe_audio_with_voxtral_async(wav_bytes, digest)
+    cached = _transcript_cache.get(digest)
+    if cached is not None:
+        return cached
+    segments = await _split_in_pool(wav_bytes, settings.STT_SEGMENT_SECONDS * 1000)
+    if len(segments) == 1:
+        return await transcribe_audio_with_voxtral_async(wav_bytes, digest)
+
+    slots = asyncio.Semaphore(max(1, settings.STT_MAX_PARALLEL))
+
+    async def _segment(seg: bytes) -> str:
+        async with slots:
+            return await transcribe_audio_with_voxtral_async(seg)
+
+    texts = await asyncio.gather(*(_segment(seg) for seg in segments))
+    text = " ".join(t.strip() for t in texts if t and t.strip())
+    if text:
+        _transcript_cache.put(digest, text)
+    return text
 
 
 def generate_reply_from_audio(wav_bytes: bytes, hint_text: str | None = None) -> str:
@@ -97,12 +386,12 @@ def generate_reply_from_audio(wav_bytes: bytes, hint_text: str | None = None) ->
     """
     try:
         client = _client()
-        audio_b64 = base64.b64encode(wav_bytes).decode("utf-8")
+        encoded = audio_b64(wav_bytes)
         messages = [
             {
                 "role": "user",
                 "content": [
-                    {"type": "input_audio", "input_audio": audio_b64},
+                    {"type": "input_audio", "input_audio": encoded},
                 ],
             }
         ]
@@ -113,7 +402,7 @@ def generate_reply_from_audio(wav_bytes: bytes, hint_text: str | None = None) ->
             messages[0]["content"].append({"type": "text", "text": "Respond briefly as a safe DeFi mentor."})
 
         resp = client.chat.complete(
-            model="voxtral-mini-latest",
+            model=get_settings().VOXTRAL_MODEL,
             messages=messages,
         )
         content = getattr(resp.choices[0].message, "content", resp.choices[0].message)
@@ -138,81 +427,275 @@ def generate_reply_from_audio(wav_bytes: bytes, hint_text: str | None = None) ->
         return "I couldn’t fully parse that audio. Could you repeat or speak a bit slower?"
 
 
-def generate_llm_reply(text: str) -> str:
+def _rule_based_reply(text: str) -> str:
+    """Safe canned reply used when the LLM is unreachable."""
+    lower = text.lower()
+    if "yield" in lower:
+        return "Yield farming can boost returns but carries risks like impermanent loss and smart-contract bugs. Start small and diversify."
+    if "staking" in lower:
+        return "Staking locks tokens to secure a network in exchange for rewards. Check lockups, slashing risk, and validator reputation."
+    if "defi" in lower:
+        return "DeFi lets you lend, borrow, and trade without banks. Always assess protocol audits, TVL, and team track record."
+    return "Here’s a quick tip: manage risk with position sizing, avoid unaudited contracts, and never chase unsustainable APRs."
+
+
+def _complete_reply(text: str) -> str:
+    client = _client()
+    # Prefer Responses API when available; fallback to Chat API for older SDKs
+    try:
+        resp_iface = getattr(client, "responses", None)
+        if resp_iface is not None:
+            r = resp_iface.create(
+                model="mistral-small-latest",
+                input=[
+                    {
+                        "role": "system",
+                        "content": [{"type": "text", "text": _SYSTEM_PROMPT}],
+                    },
+                    {
+                        "role": "user",
+                        "content": [{"type": "text", "text": _USER_PREFIX + text}],
+                    },
+                ],
+            )
+            out = getattr(r, "output_text", None)
+            if isinstance(out, str) and out.strip():
+                return out.strip()
+            return str(r)
+    except Exception:
+        pass
+
+    # Chat API fallback
+    r2 = client.chat.complete(
+        model="mistral-small-latest",
+        messages=[
+            {
+                "role": "system",
+                "content": _SYSTEM_PROMPT,
+            },
+            {"role": "user", "content": _USER_PREFIX + text},
+        ],
+    )
+    content = getattr(r2.choices[0].message, "content", r2.choices[0].message)
+    return str(content).strip()
+
+
+_reply_cache = TTLCache(
+    maxsize=get_settings().RESPONSE_CACHE_SIZE, ttl_s=get_settings().RESPONSE_CACHE_TTL_S
+)
+
+
+def _embed_for_cache(text: str):
+    # Reuse the RAG encoder (already loaded for FAQ search) and its query memo
+    from app.services.rag import get_rag_system
+    return get_rag_system().encode_query(text)
+
+
+@functools.lru_cache(maxsize=1)
+def _semantic_reply_cache() -> SemanticCache | None:
+    settings = get_settings()
+    if settings.LLM_SEMANTIC_CACHE_THRESHOLD <= 0:
+        return None
+    return SemanticCache(
+        _embed_for_cache,
+        maxsize=settings.RESPONSE_CACHE_SIZE,
+        ttl_s=settings.RESPONSE_CACHE_TTL_S,
+        threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD,
+    )
+
+
+def _reply_cache_key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _lookup_reply(key: str, query: str | None = None, scope: str = "") -> str | None:
+    # Both tiers are scoped: a reply is only reused in the context it was written for
+    cached = _reply_cache.get((scope, key))
+    if cached is not None:
+        return cached
+    try:
+        semantic = _semantic_reply_cache()
+        hit = semantic.get(query or key) if semantic is not None else None
+    except Exception as e:
+        logger.warning(f"Semantic reply cache unavailable: {e}")
+        return None
+    # A near-duplicate question only counts when it was asked in the same context
+    if hit is None or hit[0] != scope:
+        return None
+    _reply_cache.put((scope, key), hit[1])
+    return hit[1]
+
+
+def _store_reply(key: str, reply: str, query: str | None = None, scope: str = "") -> None:
+    _reply_cache.put((scope, key), reply)
+    try:
+        semantic = _semantic_reply_cache()
+        if semantic is not None:
+            semantic.put(query or key, (scope, reply))
+    except Exception as e:
+        logger.warning(f"Semantic reply cache insert failed: {e}")
+
+
+def _cache_scope(context: str | None) -> str:
+    if not context:
+        return ""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+
+def generate_llm_reply(text: str, cache_query: str | None = None, cache_context: str | None = None) -> str:
+    """Single-turn DeFi mentor reply.
+
+    Replies are cached by normalized prompt (exact tier), then by embedding
+    similarity (semantic tier); only real LLM output is cached, never the
+    rule-based fallback. Callers that wrap the user's words in a larger prompt
+    pass them as ``cache_query`` so the semantic tier compares questions rather
+    than boilerplate, and ``cache_context`` so hits never cross contexts.
+    """
     # Quick rule fallback for empty inputs
-    if not text or not str(text).strip():
-        return "I didn’t catch that. Could you rephrase your question about DeFi?"
+    if not isinstance(text, str) or not text.strip():
+        return _EMPTY_INPUT_REPLY
+    key = _reply_cache_key(text)
+    query = _reply_cache_key(cache_query) if cache_query else None
+    scope = _cache_scope(cache_context)
+    cached = _lookup_reply(key, query, scope)
+    if cached is not None:
+        return cached
+
     try:
-        client = _client()
-        # Prefer Responses API when available; fallback to Chat API for older SDKs
-        try:
-            resp_iface = getattr(client, "responses", None)
-            if resp_iface is not None:
-                r = resp_iface.create(
-                    model="mistral-small-latest",
-                    input=[
-                        {
-                            "role": "system",
-                            "content": [{"type": "text", "text": "You are Sophia, a concise and safe DeFi mentor. Keep replies under 50 words."}],
-                        },
-                        {
-                            "role": "user",
-                            "content": [{"type": "text", "text": f"Respond as a DeFi mentor to: {text}"}],
-                        },
-                    ],
-                )
-                out = getattr(r, "output_text", None)
-                if isinstance(out, str) and out.strip():
-                    return out.strip()
-                return str(r)
-        except Exception:
-            pass
+        reply = _complete_reply(text)
+    except Exception as e:
+        # Log minimal detail for debugging
+        logging.getLogger("mistral").warning(f"Responses.create failed: {e}")
+        # Safe rule-based fallback
+        return _rule_based_reply(text)
 
-        # Chat API fallback
-        r2 = client.chat.complete(
+    _store_reply(key, reply, query, scope)
+    return reply
+
+
+async def generate_llm_reply_async(text: str) -> str:
+    """Async ``generate_llm_reply`` using the SDK's native async chat API."""
+    if not isinstance(text, str) or not text.strip():
+        return _EMPTY_INPUT_REPLY
+    key = _reply_cache_key(text)
+    # The semantic tier runs the CPU-bound encoder; keep it off the event loop
+    cached = await asyncio.to_thread(_lookup_reply, key)
+    if cached is not None:
+        return cached
+
+    try:
+        r = await _client().chat.complete_async(
             model="mistral-small-latest",
             messages=[
-                {
-                    "role": "system",
-                    "content": "You are Sophia, a concise and safe DeFi mentor. Keep replies under 50 words.",
-                },
-                {"role": "user", "content": f"Respond as a DeFi mentor to: {text}"},
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": _USER_PREFIX + text},
             ],
         )
-        content = getattr(r2.choices[0].message, "content", r2.choices[0].message)
-        return str(content).strip()
+        content = getattr(r.choices[0].message, "content", r.choices[0].message)
+        reply = str(content).strip()
     except Exception as e:
-        # Log minimal detail for debugging
-        try:
-            import logging
-            logging.getLogger("mistral").warning(f"Responses.create failed: {e}")
-        except Exception:
-            pass
-        # Safe rule-based fallback
-        lower = text.lower()
-        if "yield" in lower:
-            return "Yield farming can boost returns but carries risks like impermanent loss and smart-contract bugs. Start small and diversify."
-        if "staking" in lower:
-            return "Staking locks tokens to secure a network in exchange for rewards. Check lockups, slashing risk, and validator reputation."
-        if "defi" in lower:
-            return "DeFi lets you lend, borrow, and trade without banks. Always assess protocol audits, TVL, and team track record."
-        return "Here’s a quick tip: manage risk with position sizing, avoid unaudited contracts, and never chase unsustainable APRs."
+        logging.getLogger("mistral").warning(f"chat.complete_async failed: {e}")
+        return _rule_based_reply(text)
+
+    await asyncio.to_thread(_store_reply, key, reply)
+    return reply
+
+
+_TONE_LABELS = frozenset({"positive", "neutral", "negative"})
+_TONE_INSTRUCTION = (
+    ' Respond as JSON: {"reply": "<your reply>", "tone": "positive|neutral|negative"},'
+    " where tone is the emotion your reply conveys."
+)
+
+
+async def generate_llm_reply_with_tone_async(text: str) -> tuple[str, str | None]:
+    """Like ``generate_llm_reply_async`` but also returns the reply's intended tone.
+
+    The tone (positive/neutral/negative) comes from the same JSON-mode completion,
+    so callers can skip classifying the synthesized audio. It is None when
+    unknown (fallback reply, semantic cache hit, or an unexpected label).
+    """
+    if not isinstance(text, str) or not text.strip():
+        return _EMPTY_INPUT_REPLY, None
+    key = _reply_cache_key(text)
+    cached = _reply_cache.get(("tone", key))
+    if cached is not None:
+        return cached
+    cached_reply = await asyncio.to_thread(_lookup_reply, key)
+    if cached_reply is not None:
+        return cached_reply, None
+
+    try:
+        r = await _client().chat.complete_async(
+            model="mistral-small-latest",
+            messages=[
+                {"role": "system", "content": _SYSTEM_PROMPT + _TONE_INSTRUCTION},
+                {"role": "user", "content": _USER_PREFIX + text},
+            ],
+            response_format={"type": "json_object"},
+        )
+        obj = orjson.loads(r.choices[0].message.content)
+        reply = str(obj.get("reply") or "").strip()
+        if not reply:
+            raise ValueError("empty reply in JSON response")
+        tone = obj.get("tone")
+        tone = tone if tone in _TONE_LABELS else None
+    except Exception as e:
+        logging.getLogger("mistral").warning(f"chat.complete_async (JSON tone) failed: {e}")
+        return _rule_based_reply(text), None
+
+    _reply_cache.put(("tone", key), (reply, tone))
+    await asyncio.to_thread(_store_reply, key, reply)
+    return reply, tone
+
+
+def _coalesce(tokens):
+    """Merge deltas that arrive within a short window into one chunk.
+
+    SDK deltas are often a single token; forwarding each one costs a separate
+    SSE/WebSocket frame. Buffering for ~20ms (or 64 chars) keeps streaming
+    perceptually live while sending far fewer frames. The first delta after a
+    pause is flushed immediately. A blocking iterator can only be checked when
+    a delta arrives, so here the window is a soft bound; ``_acoalesce`` flushes
+    on a timer.
+    """
+    buf: List[str] = []
+    size = 0
+    last_flush = time.monotonic()
+    for tok in tokens:
+        buf.append(tok)
+        size += len(tok)
+        now = time.monotonic()
+        if size >= _COALESCE_MAX_CHARS or now - last_flush >= _COALESCE_WINDOW_S:
+            yield "".join(buf)
+            buf.clear()
+            size = 0
+            last_flush = now
+    if buf:
+        yield "".join(buf)
 
 
 def stream_generate_llm_reply(text: str):
     """Yield tokens from Mistral in a streaming fashion.
 
     This uses the Mistral Python SDK streaming API and yields plain text chunks
-    as they arrive so the caller can forward them to clients immediately.
+    as they arrive (coalesced over ~20ms) so the caller can forward them to
+    clients immediately.
     """
+    return _coalesce(_stream_llm_tokens(text))
+
+
+def _stream_llm_tokens(text: str):
     # Handle empty input before attempting API
-    if not text or not str(text).strip():
-        yield "I didn't catch that. Could you rephrase your question about DeFi?"
+    if not isinstance(text, str) or not text.strip():
+        yield _EMPTY_INPUT_REPLY
         return
+    text = text.strip()
     
     client = _client()
     
     # Use Chat streaming with proper error handling
+    tokens_yielded = 0
     try:
         logger.info(f"Starting streaming LLM reply for text: {text[:50]}...")
         
@@ -221,59 +704,126 @@ def stream_generate_llm_reply(text: str):
             messages=[
                 {
                     "role": "system",
-                    "content": "You are Sophia, a concise and safe DeFi mentor. Keep replies under 50 words.",
+                    "content": _SYSTEM_PROMPT,
                 },
-                {"role": "user", "content": f"Respond as a DeFi mentor to: {text}"},
+                {"role": "user", "content": _USER_PREFIX + text},
             ],
         )
         
-        tokens_yielded = 0
         for chunk in stream:
             try:
-                # Handle different chunk formats from Mistral SDK
-                if hasattr(chunk, 'choices') and chunk.choices:
-                    delta = chunk.choices[0].delta
-                    if hasattr(delta, 'content') and delta.content:
-                        yield delta.content
-                        tokens_yielded += 1
-                elif hasattr(chunk, 'delta') and chunk.delta:
-                    if hasattr(chunk.delta, 'content') and chunk.delta.content:
-                        yield chunk.delta.content
-                        tokens_yielded += 1
-                elif hasattr(chunk, 'content') and chunk.content:
-                    yield chunk.content
-                    tokens_yielded += 1
-            except Exception as e:
-                logger.warning(f"Error processing stream chunk: {e}")
+                token = _delta_text(chunk)
+            except (AttributeError, IndexError):
+                # Keep-alive or choice-less chunk (e.g. final usage event)
                 continue
+            if token:
+                yield token
+                tokens_yielded += 1
                 
         logger.info(f"Streaming completed, yielded {tokens_yielded} tokens")
         
         if tokens_yielded == 0:
             logger.warning("No tokens were yielded from stream, falling back to rule-based response")
             # Fallback to rule-based response if streaming failed
-            lower = text.lower()
-            if "yield" in lower:
-                yield "Yield farming can boost returns but carries risks like impermanent loss and smart-contract bugs. Start small and diversify."
-            elif "staking" in lower:
-                yield "Staking locks tokens to secure a network in exchange for rewards. Check lockups, slashing risk, and validator reputation."
-            elif "defi" in lower:
-                yield "DeFi lets you lend, borrow, and trade without banks. Always assess protocol audits, TVL, and team track record."
-            else:
-                yield "Here's a quick tip: manage risk with position sizing, avoid unaudited contracts, and never chase unsustainable APRs."
+            yield _rule_based_reply(text)
         
     except Exception as e:
         logger.error(f"Streaming LLM reply failed: {e}")
+        if tokens_yielded:
+            # Partial reply already sent; don't append an unrelated fallback
+            return
         # Final rule fallback
-        lower = text.lower()
-        if "yield" in lower:
-            yield "Yield farming can boost returns but carries risks like impermanent loss and smart-contract bugs. Start small and diversify."
-        elif "staking" in lower:
-            yield "Staking locks tokens to secure a network in exchange for rewards. Check lockups, slashing risk, and validator reputation."
-        elif "defi" in lower:
-            yield "DeFi lets you lend, borrow, and trade without banks. Always assess protocol audits, TVL, and team track record."
-        else:
-            yield "Here's a quick tip: manage risk with position sizing, avoid unaudited contracts, and never chase unsustainable APRs."
+        yield _rule_based_reply(text)
+
+
+async def _acoalesce(tokens):
+    """Async ``_coalesce`` for token streams consumed on the event loop.
+
+    The next delta is awaited with a timeout, so buffered text goes out once
+    the window elapses even if the model stalls before its next token.
+    """
+    source = tokens.__aiter__()
+    buf: List[str] = []
+    size = 0
+    last_flush = time.monotonic()
+    deadline = None  # when the buffered text must be flushed
+    next_tok = asyncio.ensure_future(source.__anext__())
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            # asyncio.wait (not wait_for) leaves the pending __anext__ running on timeout
+            done, _ = await asyncio.wait({next_tok}, timeout=timeout)
+            if not done:
+                yield "".join(buf)
+                buf.clear()
+                size = 0
+                last_flush = time.monotonic()
+                deadline = None
+                continue
+            try:
+                tok = next_tok.result()
+            except StopAsyncIteration:
+                break
+            next_tok = asyncio.ensure_future(source.__anext__())
+            buf.append(tok)
+            size += len(tok)
+            now = time.monotonic()
+            if size >= _COALESCE_MAX_CHARS or now - last_flush >= _COALESCE_WINDOW_S:
+                yield "".join(buf)
+                buf.clear()
+                size = 0
+                last_flush = now
+                deadline = None
+            elif deadline is None:
+                deadline = last_flush + _COALESCE_WINDOW_S
+        if buf:
+            yield "".join(buf)
+    finally:
+        # Consumer stopped early (client disconnect): don't leave a read pending
+        if not next_tok.done():
+            next_tok.cancel()
+
+
+def stream_generate_llm_reply_async(text: str):
+    """Async ``stream_generate_llm_reply`` for use inside request handlers.
+
+    Reads the SDK's async stream, so waiting on the next token yields to the
+    event loop instead of blocking every other request on it.
+    """
+    return _acoalesce(_astream_llm_tokens(text))
+
+
+async def _astream_llm_tokens(text: str):
+    if not isinstance(text, str) or not text.strip():
+        yield _EMPTY_INPUT_REPLY
+        return
+    text = text.strip()
+
+    tokens_yielded = 0
+    try:
+        stream = await _client().chat.stream_async(
+            model="mistral-small-latest",
+            messages=[
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": _USER_PREFIX + text},
+            ],
+        )
+        async for chunk in stream:
+            try:
+                token = _delta_text(chunk)
+            except (AttributeError, IndexError):
+                # Keep-alive or choice-less chunk (e.g. final usage event)
+                continue
+            if token:
+                yield token
+                tokens_yielded += 1
+    except Exception as e:
+        logger.error(f"Async streaming LLM reply failed: {e}")
+        if tokens_yielded:
+            # Partial reply already sent; don't append an unrelated fallback
+            return
+    if tokens_yielded == 0:
+        yield _rule_based_reply(text)
 
 
 def stream_generate_reply_from_audio(wav_bytes: bytes):
@@ -282,21 +832,26 @@ def stream_generate_reply_from_audio(wav_bytes: bytes):
     This bypasses separate STT and uses Voxtral's native audio understanding
     with streaming for the fastest possible response times.
     """
+    return _coalesce(_stream_audio_reply_tokens(wav_bytes))
+
+
+def _stream_audio_reply_tokens(wav_bytes: bytes):
+    tokens_yielded = 0
     try:
         client = _client()
-        audio_b64 = base64.b64encode(wav_bytes).decode("utf-8")
+        encoded = audio_b64(wav_bytes)
         
         logger.info("Starting Voxtral audio streaming...")
         
         stream = client.chat.stream(
-            model="voxtral-mini-latest",
+            model=get_settings().VOXTRAL_MODEL,
             messages=[
                 {
                     "role": "user",
                     "content": [
                         {
                             "type": "input_audio",
-                            "input_audio": audio_b64,
+                            "input_audio": encoded,
                         },
                         {
                             "type": "text",
@@ -307,31 +862,15 @@ def stream_generate_reply_from_audio(wav_bytes: bytes):
             ],
         )
         
-        tokens_yielded = 0
         for chunk in stream:
             try:
-                # Handle CompletionEvent wrapper from newer Mistral SDK
-                if hasattr(chunk, 'data'):
-                    chunk_data = chunk.data
-                else:
-                    chunk_data = chunk
-                
-                # Handle different chunk formats from Mistral SDK
-                if hasattr(chunk_data, 'choices') and chunk_data.choices:
-                    delta = chunk_data.choices[0].delta
-                    if hasattr(delta, 'content') and delta.content:
-                        yield delta.content
-                        tokens_yielded += 1
-                elif hasattr(chunk_data, 'delta') and chunk_data.delta:
-                    if hasattr(chunk_data.delta, 'content') and chunk_data.delta.content:
-                        yield chunk_data.delta.content
-                        tokens_yielded += 1
-                elif hasattr(chunk_data, 'content') and chunk_data.content:
-                    yield chunk_data.content
-                    tokens_yielded += 1
-            except Exception as e:
-                logger.warning(f"Error processing Voxtral stream chunk: {e}")
+                token = _delta_text(chunk)
+            except (AttributeError, IndexError):
+                # Keep-alive or choice-less chunk (e.g. final usage event)
                 continue
+            if token:
+                yield token
+                tokens_yielded += 1
                 
         logger.info(f"Voxtral streaming completed, yielded {tokens_yielded} tokens")
         
@@ -341,7 +880,7 @@ def stream_generate_reply_from_audio(wav_bytes: bytes):
             try:
                 text = transcribe_audio_with_voxtral(wav_bytes)
                 if text:
-                    for token in stream_generate_llm_reply(text):
+                    for token in _stream_llm_tokens(text):
                         yield token
                 else:
                     yield "I couldn't understand the audio. Could you try speaking more clearly?"
@@ -350,11 +889,13 @@ def stream_generate_reply_from_audio(wav_bytes: bytes):
         
     except Exception as e:
         logger.error(f"Voxtral audio streaming failed: {e}")
+        if tokens_yielded:
+            return
         # Fallback to traditional STT + text streaming
         try:
             text = transcribe_audio_with_voxtral(wav_bytes)
             if text:
-                for token in stream_generate_llm_reply(text):
+                for token in _stream_llm_tokens(text):
                     yield token
             else:
                 yield "I couldn't understand the audio. Could you try speaking more clearly?"
@@ -1,21 +1,53 @@
+import functools
+import hashlib
 import json
 import logging
+import os
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
-from sentence_transformers import SentenceTransformer
 from app.config import get_settings
 from app.services.supabase import get_supabase
 
+if TYPE_CHECKING:
+    # Imported in _load_model: pulling in torch/transformers takes seconds, so
+    # importing this module stays cheap until the encoder is first needed
+    from sentence_transformers import SentenceTransformer
+
+try:
+    # Optional: hand-written AVX-512/NEON similarity kernels
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    # Optional: SIMD exact search for larger FAQ catalogs
+    import faiss
+except ImportError:
+    faiss = None
+
 logger = logging.getLogger(__name__)
 
+# HF tokenizers warn (and can deadlock) when a process forks after using them
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+# FAQ matrix storage dtype: SimSIMD has native f16 kernels (half the memory and
+# bandwidth); NumPy has no f16 BLAS path, so keep float32 when falling back.
+_EMBEDDING_DTYPE = np.float16 if simsimd is not None else np.float32
+
+# Use a FAISS index only once the catalog is big enough to amortize it
+_FAISS_MIN_FAQS = 64
+
+# Rows per tile in the blocked NumPy scan: 4096 x 384 float32 (~6 MB) keeps a
+# tile's GEMV L2-friendly and bounds the scratch similarity buffer
+_SCAN_BLOCK_ROWS = 4096
+
 @dataclass
 class FAQEntry:
     id: str
     question: str
     answer: str
     category: str
-    embedding: Optional[List[float]] = None
 
 @dataclass
 class RAGResult:
@@ -29,32 +61,128 @@ class RAGSystem:
     
     def __init__(self):
         self.settings = get_settings()
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')  # Lightweight model
+        # The variant tag keys the persisted FAQ matrix, so a backend or
+        # quantization change re-embeds instead of mixing embedding spaces
+        self.model, self._encoder_variant = self._load_model()
         self.supabase = get_supabase()
+        # Row i of faq_matrix is the L2-normalized question embedding of faqs[i]
+        self.faq_matrix: np.ndarray = np.empty((0, 0), dtype=_EMBEDDING_DTYPE)
         self.faqs = self._load_faqs()
+        self.index = self._build_index()
         self.similarity_threshold = 0.7  # Cosine similarity threshold
+        # Per-instance memo of query embeddings (keyed on normalized text)
+        self._encode_cached = functools.lru_cache(maxsize=1024)(self._encode_text)
+        self._query_count = 0
+        
+    def _load_model(self) -> Tuple["SentenceTransformer", str]:
+        """Load the lightweight MiniLM encoder on the configured backend.
+
+        Returns the model and a tag naming its backend and precision.
+        """
+        from sentence_transformers import SentenceTransformer
+
+        if self.settings.RAG_ENCODER_BACKEND == "onnx":
+            try:
+                # Pre-exported, INT8-quantized graph shipped with the hub model;
+                # requires sentence-transformers>=3.2 with optimum + onnxruntime
+                model = SentenceTransformer(
+                    'all-MiniLM-L6-v2',
+                    backend="onnx",
+                    model_kwargs={"file_name": "onnx/model_qint8_avx512_vnni.onnx"},
+                )
+                logger.info("Loaded RAG encoder on ONNX Runtime (INT8 VNNI)")
+                return model, "onnx-qint8-avx512-vnni"
+            except Exception as e:
+                logger.warning(f"ONNX RAG encoder unavailable; falling back to torch: {e}")
         
+        model = SentenceTransformer('all-MiniLM-L6-v2')
+        if self.settings.RAG_QUANTIZE_INT8 and self._quantize_model(model):
+            return model, "torch-qint8"
+        return model, "torch-fp32"
+    
+    @staticmethod
+    def _quantize_model(model: "SentenceTransformer") -> bool:
+        """Quantize the encoder's Linear layers to INT8 in place for faster CPU inference.
+
+        Runs before the FAQ matrix is built so FAQ and query embeddings come
+        from the same (quantized) model. Output dimension is unchanged (384).
+        Returns whether the model was quantized.
+        """
+        try:
+            import torch
+            if model.device.type != "cpu":
+                return False
+            transformer = model[0]
+            transformer.auto_model = torch.ao.quantization.quantize_dynamic(
+                transformer.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("Quantized RAG encoder to INT8")
+            return True
+        except Exception as e:
+            logger.warning(f"INT8 quantization of RAG encoder failed; using FP32: {e}")
+            return False
+    
     def _load_faqs(self) -> List[FAQEntry]:
-        """Load and embed DeFi FAQs"""
+        """Load DeFi FAQs and embed all questions into ``self.faq_matrix``"""
         faqs_data = self._get_default_faqs()
-        faqs = []
-        
-        for faq_data in faqs_data:
-            # Generate embedding for the question
-            embedding = self.model.encode(faq_data["question"]).tolist()
-            
-            faq = FAQEntry(
+        faqs = [
+            FAQEntry(
                 id=faq_data["id"],
                 question=faq_data["question"],
                 answer=faq_data["answer"],
                 category=faq_data["category"],
-                embedding=embedding
             )
-            faqs.append(faq)
+            for faq_data in faqs_data
+        ]
+        
+        self.faq_matrix = self._embed_questions([faq.question for faq in faqs])
         
         logger.info(f"Loaded {len(faqs)} DeFi FAQs with embeddings")
         return faqs
     
+    def _embed_questions(self, questions: List[str]) -> np.ndarray:
+        """Embed FAQ questions, reusing an on-disk matrix from a previous boot.
+        
+        The cache file is keyed on the questions, encoder variant and dtype,
+        so any change to the catalog or model produces a fresh file.
+        """
+        key = hashlib.sha256(
+            json.dumps([questions, self._encoder_variant, np.dtype(_EMBEDDING_DTYPE).name]).encode("utf-8")
+        ).hexdigest()[:16]
+        path = os.path.join(os.path.expanduser(self.settings.RAG_CACHE_DIR), f"faq_embs_{key}.npy")
+        
+        try:
+            matrix = np.load(path, mmap_mode="r")
+            if matrix.shape[0] == len(questions):
+                logger.info(f"Loaded FAQ embeddings from {path}")
+                return matrix
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable FAQ embedding cache {path}: {e}")
+        
+        # One forward pass over all questions; normalized rows make cosine a dot product
+        matrix = np.ascontiguousarray(
+            self.model.encode(
+                questions,
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ),
+            dtype=_EMBEDDING_DTYPE,
+        )
+        
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, path)  # atomic: concurrent workers never see a partial file
+        except Exception as e:
+            logger.warning(f"Could not persist FAQ embeddings to {path}: {e}")
+        return matrix
+    
     def _get_default_faqs(self) -> List[Dict[str, Any]]:
         """Default DeFi FAQ entries"""
         return [
@@ -186,29 +314,107 @@ class RAGSystem:
             logger.warning("No FAQs loaded for RAG query")
             return []
         
-        # Encode the query
-        query_embedding = self.model.encode([query])
+        query_embedding = self.encode_query(query)
+        
+        indices, scores = self._search(query_embedding, top_k)
         
-        # Calculate cosine similarities
+        # Candidates are best-first; keep those above threshold
         results = []
-        for faq in self.faqs:
-            if faq.embedding:
-                # Calculate cosine similarity
-                similarity = np.dot(query_embedding[0], faq.embedding) / (
-                    np.linalg.norm(query_embedding[0]) * np.linalg.norm(faq.embedding)
-                )
-                
-                if similarity >= self.similarity_threshold:
-                    results.append(RAGResult(
-                        question=faq.question,
-                        answer=faq.answer,
-                        similarity_score=similarity,
-                        category=faq.category
-                    ))
-        
-        # Sort by similarity and return top_k
-        results.sort(key=lambda x: x.similarity_score, reverse=True)
-        return results[:top_k]
+        for idx, score in zip(indices, scores):
+            similarity = float(score)
+            if similarity < self.similarity_threshold:
+                break
+            faq = self.faqs[idx]
+            results.append(RAGResult(
+                question=faq.question,
+                answer=faq.answer,
+                similarity_score=similarity,
+                category=faq.category
+            ))
+        return results
+    
+    def _encode_text(self, text: str) -> bytes:
+        # Stored as bytes: hashable-result friendly and immutable once cached
+        emb = self.model.encode([text], convert_to_numpy=True, normalize_embeddings=True)[0]
+        return emb.astype(np.float32, copy=False).tobytes()
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """L2-normalized query embedding, memoized on normalized text.
+        
+        MiniLM is uncased, so lowercasing and collapsing whitespace doesn't
+        change the embedding but lets repeated questions hit the cache.
+        """
+        normalized = " ".join(query.lower().split())
+        emb = np.frombuffer(self._encode_cached(normalized), dtype=np.float32)
+        
+        self._query_count += 1
+        if self._query_count % 100 == 0:
+            info = self._encode_cached.cache_info()
+            logger.info(f"RAG query embedding cache: hits={info.hits} misses={info.misses} size={info.currsize}")
+        return emb
+    
+    def _build_index(self):
+        """Exact inner-product FAISS index over the normalized FAQ rows (= cosine)"""
+        if faiss is None or len(self.faqs) < _FAISS_MIN_FAQS:
+            # For small catalogs the plain scan beats FAISS call overhead
+            return None
+        index = faiss.IndexFlatIP(self.faq_matrix.shape[1])
+        index.add(np.ascontiguousarray(self.faq_matrix, dtype=np.float32))
+        logger.info(f"Built FAISS IndexFlatIP over {index.ntotal} FAQs")
+        return index
+    
+    def _search(self, query_embedding: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and cosine scores of the top_k FAQs, best first"""
+        if self.index is not None:
+            scores, indices = self.index.search(
+                query_embedding.reshape(1, -1).astype(np.float32, copy=False), top_k
+            )
+            found = indices[0] >= 0  # FAISS pads with -1 when top_k > ntotal
+            return indices[0][found], scores[0][found]
+        
+        if simsimd is None and len(self.faq_matrix) > _SCAN_BLOCK_ROWS:
+            return self._blocked_search(query_embedding, top_k)
+        
+        sims = self._similarities(query_embedding)
+        k = min(top_k, len(sims))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), sims[:0]
+        # Quickselect the k best (O(N)), then order just those k
+        cand = np.argpartition(-sims, k - 1)[:k]
+        cand = cand[np.argsort(-sims[cand])]
+        return cand, sims[cand]
+    
+    def _blocked_search(self, query_embedding: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k GEMV scan over _SCAN_BLOCK_ROWS tiles, merging a running top-k"""
+        k = min(top_k, len(self.faq_matrix))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+        best_idx = np.empty(0, dtype=np.intp)
+        best_sims = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self.faq_matrix), _SCAN_BLOCK_ROWS):
+            sims = self.faq_matrix[start:start + _SCAN_BLOCK_ROWS] @ query_embedding
+            # Nothing in this tile can displace the current k-th best
+            if len(best_sims) == k and sims.max() <= best_sims.min():
+                continue
+            kb = min(k, len(sims))
+            cand = np.argpartition(-sims, kb - 1)[:kb]
+            best_idx = np.concatenate([best_idx, cand + start])
+            best_sims = np.concatenate([best_sims, sims[cand]])
+            if len(best_sims) > k:
+                keep = np.argpartition(-best_sims, k - 1)[:k]
+                best_idx, best_sims = best_idx[keep], best_sims[keep]
+        order = np.argsort(-best_sims)
+        return best_idx[order], best_sims[order]
+    
+    def _similarities(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a normalized query against every FAQ row"""
+        if simsimd is not None:
+            # SimSIMD returns cosine *distance*; convert back to similarity
+            query = query_embedding.astype(self.faq_matrix.dtype)[None, :]
+            dist = simsimd.cdist(query, self.faq_matrix, metric="cosine")
+            return 1.0 - np.asarray(dist, dtype=np.float32)[0]
+        # Rows and query are L2-normalized, so a single GEMV gives the cosines
+        return self.faq_matrix @ query_embedding
     
     def get_context_for_llm(self, query: str) -> str:
         """Get formatted context for LLM from RAG results"""
@@ -247,5 +453,7 @@ class RAGSystem:
         except Exception as e:
             logger.error(f"Failed to persist FAQs to Supabase: {e}")
 
-# Singleton instance
-rag_system = RAGSystem()
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_rag_system() -> RAGSystem:
+    """Lazily built singleton; the encoder is loaded on first use, not at import."""
+    return RAGSystem()
@@ -1,12 +1,16 @@
+import atexit
 import os
+import queue
+import secrets
+import threading
 import time
 import uuid
 from typing import Any, Dict
 from dotenv import load_dotenv, find_dotenv
 from supabase import create_client, Client
-
-# Global client instance
-_supabase: Client | None = None
+from app.config import get_settings
+from app.services.audio import audio_digest
+from app.services.cache import TTLCache
 
 # Load environment variables from .env (portable)
 load_dotenv(find_dotenv(), override=False)
@@ -26,49 +30,105 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Optional: direct SQL helpers if available
 try:
-    from app.services.db import insert_emotion_score_sql, insert_conversation_session_sql  # type: ignore
+    from app.services.db import (  # type: ignore
+        insert_emotion_score_sql,
+        insert_emotion_scores_sql,
+        insert_conversation_session_sql,
+        insert_conversation_sessions_sql,
+    )
 except Exception:
     insert_emotion_score_sql = None  # type: ignore
+    insert_emotion_scores_sql = None  # type: ignore
     insert_conversation_session_sql = None  # type: ignore
+    insert_conversation_sessions_sql = None  # type: ignore
+
+try:
+    from postgrest.exceptions import APIError  # type: ignore
+except Exception:
+    APIError = None  # type: ignore
+
+# Row writes are queued and flushed in bulk by a background thread so request
+# handlers never wait on a Supabase round-trip.
+_FLUSH_INTERVAL_S = 0.2
+_FLUSH_MAX_ROWS = 64
+# emotion_scores rows reference conversation_sessions, so parents flush first
+_TABLE_ORDER = ("conversation_sessions", "emotion_scores")
+# Backoff between attempts when a REST write fails on the network (not a 4xx/5xx)
+_RETRY_DELAYS_S = (0.25, 1.0)
+# Tables with a client-generated primary key; a retry after an ambiguous network
+# failure skips rows that already landed (resolution=ignore-duplicates), matching
+# the SQL path's "on conflict (id) do nothing"
+_UPSERT_TABLES = frozenset({"conversation_sessions"})
+# conversation_sessions.session_id is added by
+# add_session_id_to_conversation_sessions.sql; until it runs, rows are written
+# without it instead of failing. Probed once, from the writer thread.
+_session_id_column: bool | None = None
+_write_queue: "queue.Queue[tuple[str, Dict[str, Any]]]" = queue.Queue()
+_flusher: threading.Thread | None = None
+_flusher_lock = threading.Lock()
 
 def get_supabase() -> Client:
-    global _supabase
-    if _supabase is None:
-        # Use environment variables directly for testing
-        if not SUPABASE_URL or not SUPABASE_KEY:
-            # Return the already-initialized client for testing
-            return supabase
-        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    return _supabase
+    # One client (and one pooled HTTP session) for the whole process
+    return supabase
     
-def upload_audio_and_get_url(file_bytes: bytes, file_name: str | None = None) -> str:
+# Public URLs of audio already in storage, keyed by content sha256. TTS replies
+# are cached per text, so a repeated reply reuses its first upload.
+_uploaded_urls = TTLCache(maxsize=512, ttl_s=get_settings().RESPONSE_CACHE_TTL_S)
+
+
+def audio_file_name(prefix: str = "sophia") -> str:
+    """Random storage name for a reply clip.
+
+    Random rather than millisecond-timestamp names: concurrent requests can't
+    collide and overwrite each other's MP3 in storage.
+    """
+    return f"{prefix}_{secrets.token_urlsafe(10)}.mp3"
+
+
+def upload_audio_and_get_url(file_bytes: bytes, file_name: str | None = None, digest: bytes | None = None) -> str:
     """Upload audio file to Supabase storage and return public URL.
     
     Note: This function doesn't require a user_id as it uses storage, not the database.
+    Identical bytes uploaded earlier return the existing URL without a new upload;
+    ``digest`` is the clip's ``audio_digest`` when the caller already has it.
     """
+    digest = digest or audio_digest(file_bytes)
+    cached = _uploaded_urls.get(digest)
+    if cached is not None:
+        return cached
+    file_options = None
     if not file_name:
+        # A fresh UUID name can't collide, so a plain upload is enough
         file_name = f"sophia_{uuid.uuid4().hex}.mp3"
+    else:
+        # Caller-chosen names may already exist; replace in the same request
+        # instead of a separate remove() round-trip
+        file_options = {"upsert": "true"}
     path = f"{SUPABASE_AUDIO_PREFIX}{file_name}"
 
-    # Remove file if it exists
-    try:
-        supabase.storage.from_(SUPABASE_BUCKET_AUDIO).remove([path])
-    except Exception:
-        pass
-
     # Upload file (storage3 returns an UploadResponse object; exceptions indicate failures)
     try:
-        res = supabase.storage.from_(SUPABASE_BUCKET_AUDIO).upload(path, file_bytes)
+        res = supabase.storage.from_(SUPABASE_BUCKET_AUDIO).upload(path, file_bytes, file_options)
     except Exception as e:
         raise RuntimeError(f"Supabase upload failed: {e}")
 
     # Return public URL
     public_url = supabase.storage.from_(SUPABASE_BUCKET_AUDIO).get_public_url(path)
+    _uploaded_urls.put(digest, public_url)
     return public_url
 
 
+def _emotion_fields(emotion: Any) -> tuple:
+    """(label, confidence) from an Emotion model or its dict form."""
+    if emotion is None:
+        return None, None
+    if isinstance(emotion, dict):
+        return emotion.get("label"), emotion.get("confidence")
+    return getattr(emotion, "label", None), getattr(emotion, "confidence", None)
+
+
 def insert_emotion_score(session_id, role: str, emotion: Any, user_id: str = None) -> None:
-    """Insert a row into the emotion_scores table using the test user ID if none provided.
+    """Queue a row for the emotion_scores table using the test user ID if none provided.
     
     Note: This function will always use the test user ID if no user_id is provided.
     """
@@ -85,30 +145,20 @@ def insert_emotion_score(session_id, role: str, emotion: Any, user_id: str = Non
         logging.warning("Skipping emotion score insertion: No valid user_id available")
         return
     
+    label, confidence = _emotion_fields(emotion)
     payload = {
         "session_id": str(session_id),
         "role": role,
-        "label": getattr(emotion, "label", "neutral"),
-        "confidence": float(getattr(emotion, "confidence", 0.5)),
+        "label": label or "neutral",
+        "confidence": float(0.5 if confidence is None else confidence),
         "user_id": user_id,
     }
     
-    try:
-        supabase.table("emotion_scores").insert(payload).execute()
-    except Exception as e:
-        import logging
-        logging.warning(f"emotion_scores insert failed: {e}")
-        # Don't raise the exception, just log it and continue
-    if SUPABASE_DB_DSN and insert_emotion_score_sql:
-        try:
-            insert_emotion_score_sql(payload)
-            return
-        except Exception:
-            pass
+    _enqueue_row("emotion_scores", payload)
 
 
 def insert_conversation_session(data: Dict[str, Any]) -> None:
-    """Insert a conversation session row using SQL if DSN is set; otherwise REST.
+    """Queue a conversation session row (written via SQL if DSN is set; otherwise REST).
     
     Note: This function will always use the test user ID if no user_id is provided.
     """
@@ -127,13 +177,14 @@ def insert_conversation_session(data: Dict[str, Any]) -> None:
     
     # Ensure all SQL parameters expected by insert_conversation_session_sql are present
     # If missing, provide sensible defaults.
-    # Required by SQL helper: id, user_id, transcript, reply,
+    # Required by SQL helper: id, session_id, user_id, transcript, reply,
     # user_emotion_label, user_emotion_confidence, sophia_emotion_label,
     # sophia_emotion_confidence, audio_url
     if "id" not in data or not data.get("id"):
         # Generate a session id if not provided
         data["id"] = str(uuid.uuid4())
     # Default optional fields to None if absent
+    data.setdefault("session_id", None)
     data.setdefault("transcript", None)
     data.setdefault("reply", None)
     data.setdefault("user_emotion_label", None)
@@ -142,22 +193,193 @@ def insert_conversation_session(data: Dict[str, Any]) -> None:
     data.setdefault("sophia_emotion_confidence", None)
     data.setdefault("audio_url", None)
             
-    if SUPABASE_DB_DSN and insert_conversation_session_sql:
-        try:
-            insert_conversation_session_sql(data)
-            return
-        except Exception as e:
-            import logging
-            logging.warning(f"SQL insert_conversation_session failed: {e}")
+    _enqueue_row("conversation_sessions", data)
+
 
-    # REST insert with clearer error surfacing
+def start_background_writer() -> None:
+    """Start the background flusher thread if it isn't running yet."""
+    global _flusher
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_loop, name="supabase-writer", daemon=True)
+                _flusher.start()
+
+
+def persist_conversation(
+    session_id: str | None,
+    transcript: str | None,
+    reply: str | None,
+    user_emotion: Any = None,
+    sophia_emotion: Any = None,
+    audio_url: str | None = None,
+    **extra: Any,
+) -> None:
+    """Queue a conversation_sessions row and its emotion_scores rows.
+
+    The session row is queued first so the emotion rows' FK resolves. Emotions
+    may be Emotion models or their dict form; extra columns (intent,
+    context_memory) pass through. Never raises.
+    """
+    import logging
+    user_label, user_conf = _emotion_fields(user_emotion)
+    sophia_label, sophia_conf = _emotion_fields(sophia_emotion)
+    row = {
+        "transcript": transcript,
+        "reply": reply,
+        "user_emotion_label": user_label,
+        "user_emotion_confidence": user_conf,
+        "sophia_emotion_label": sophia_label,
+        "sophia_emotion_confidence": sophia_conf,
+        "audio_url": audio_url or None,
+        # Every turn is its own row (id generated per turn); the client's
+        # session id groups them, so reusing it never overwrites history
+        "session_id": session_id or None,
+        **extra,
+    }
     try:
-        supabase.table("conversation_sessions").insert(data).execute()
+        insert_conversation_session(row)
     except Exception as e:
-        # Log error but don't raise exception
+        logging.warning(f"Failed to persist conversation session: {e}")
+        return
+    for role, emotion in (("user", user_emotion), ("sophia", sophia_emotion)):
+        if emotion is None:
+            continue
+        try:
+            insert_emotion_score(row["id"], role=role, emotion=emotion)
+        except Exception as e:
+            logging.warning(f"Failed to persist {role} emotion: {e}")
+
+
+def _enqueue_row(table: str, row: Dict[str, Any]) -> None:
+    """Queue a row for the background flusher, starting it on first use."""
+    if _flusher is None:
+        start_background_writer()
+    _write_queue.put_nowait((table, row))
+
+
+def _flush_loop() -> None:
+    while True:
+        batch = [_write_queue.get()]
+        deadline = time.monotonic() + _FLUSH_INTERVAL_S
+        while len(batch) < _FLUSH_MAX_ROWS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_write_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _flush_batch(batch)
+
+
+def _flush_batch(batch: list) -> None:
+    by_table: Dict[str, list] = {}
+    for table, row in batch:
+        by_table.setdefault(table, []).append(row)
+    for table in _TABLE_ORDER:
+        rows = by_table.get(table)
+        if rows:
+            _write_rows(table, rows)
+
+
+def _has_session_id_column() -> bool:
+    global _session_id_column
+    if _session_id_column is None:
         import logging
-        logging.warning(f"conversation_sessions insert failed: {e}")
-        # Don't raise the exception, just log it and continue
+        try:
+            supabase.table("conversation_sessions").select("session_id").limit(1).execute()
+            _session_id_column = True
+        except Exception as e:
+            if APIError is None or not isinstance(e, APIError):
+                # Transport error: don't cache; keep this batch's rows writable
+                return False
+            _session_id_column = False
+            logging.warning(
+                "conversation_sessions.session_id is missing; turns are stored ungrouped "
+                f"until add_session_id_to_conversation_sessions.sql is applied: {e}"
+            )
+    return _session_id_column
+
+
+def _write_rows(table: str, rows: list) -> None:
+    """Write rows via SQL if DSN is set; otherwise (or on SQL failure) bulk REST."""
+    import logging
+    if table == "conversation_sessions" and not _has_session_id_column():
+        rows = [{k: v for k, v in row.items() if k != "session_id"} for row in rows]
+    sql_insert, sql_insert_many = {
+        "conversation_sessions": (insert_conversation_session_sql, insert_conversation_sessions_sql),
+        "emotion_scores": (insert_emotion_score_sql, insert_emotion_scores_sql),
+    }.get(table, (None, None))
+    if SUPABASE_DB_DSN and sql_insert and sql_insert_many:
+        try:
+            sql_insert_many(rows)
+            return
+        except Exception as e:
+            logging.warning(f"SQL bulk insert into {table} failed: {e}")
+        failed = []
+        for row in rows:
+            try:
+                sql_insert(row)
+            except Exception as e:
+                logging.warning(f"SQL insert into {table} failed: {e}")
+                failed.append(row)
+        rows = failed
+        if not rows:
+            return
+
+    # PostgREST bulk inserts expect every object to share the same keys
+    groups: Dict[tuple, list] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    for group in groups.values():
+        try:
+            _rest_insert(table, group)
+        except Exception as e:
+            logging.warning(f"{table} bulk insert of {len(group)} rows failed: {e}")
+            if len(group) == 1:
+                continue
+            # Retry row by row so one bad row doesn't drop the whole batch
+            for row in group:
+                try:
+                    _rest_insert(table, row)
+                except Exception as e:
+                    logging.warning(f"{table} insert failed: {e}")
+
+
+def _rest_insert(table: str, rows) -> None:
+    """REST insert, retried with backoff on transport errors.
+
+    PostgREST errors (constraint violations etc.) won't succeed on retry and
+    are raised immediately.
+    """
+    for delay in _RETRY_DELAYS_S + (None,):
+        try:
+            query = supabase.table(table)
+            if table in _UPSERT_TABLES:
+                query.upsert(rows, ignore_duplicates=True).execute()
+            else:
+                query.insert(rows).execute()
+            return
+        except Exception as e:
+            if delay is None or (APIError is not None and isinstance(e, APIError)):
+                raise
+            time.sleep(delay)
+
+
+def flush_pending_writes() -> None:
+    """Synchronously write whatever is still queued (used at interpreter exit)."""
+    batch = []
+    while True:
+        try:
+            batch.append(_write_queue.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        _flush_batch(batch)
+
+
+atexit.register(flush_pending_writes)
 
 
 def has_user_consent(discord_id: str) -> bool:
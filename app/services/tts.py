@@ -1,18 +1,57 @@
 import base64
+import httpx
+import orjson
+import re
 import requests
 from app.config import get_settings
+from app.services.cache import SingleFlight, TTLCache
 import logging
+from requests.adapters import HTTPAdapter
 logger = logging.getLogger("sophia-backend")
 
+# Shared keep-alive session so TTS calls reuse pooled TLS connections to Inworld
+_session = requests.Session()
+_session.headers.update({"Content-Type": "application/json"})
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+# Async counterpart for streaming TTS from request handlers
+_aclient = httpx.AsyncClient(
+    timeout=60, limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
 
-def synthesize_inworld(text: str) -> bytes:
-    """Call Inworld TTS and return MP3 bytes. Requires INWORLD_API_KEY (Basic base64 token)."""
-    settings = get_settings()
-    if not settings.INWORLD_API_KEY:
-        # simple mock tone if key missing
-        logger.warning("TTS: INWORLD_API_KEY missing; returning mock audio bytes")
-        return b"ID3mock-mp3"
+_STREAM_URL = "https://api.inworld.ai/tts/v1/voice:stream"
 
+
+async def warmup_async() -> None:
+    """Open a pooled connection to Inworld on the shared async client.
+
+    Any response (even an error status) leaves a keep-alive TLS connection
+    behind, so the first reply's synthesis skips the handshake.
+    """
+    if not get_settings().INWORLD_API_KEY:
+        return
+    try:
+        await _aclient.head(_STREAM_URL, timeout=10)
+    except Exception:
+        logger.debug("Inworld warmup failed", exc_info=True)
+
+
+async def aclose() -> None:
+    """Close the shared async client's pooled connections (app shutdown)."""
+    await _aclient.aclose()
+
+# Inworld requires at least one Unicode letter or digit in the text
+_WORD_RE = re.compile(r"\w", re.UNICODE)
+
+# Synthesized MP3 bytes keyed by (voice, model, text); mock audio is never cached
+_audio_cache = TTLCache(
+    maxsize=get_settings().RESPONSE_CACHE_SIZE, ttl_s=get_settings().RESPONSE_CACHE_TTL_S
+)
+_syntheses_in_flight = SingleFlight()
+
+
+def _voice_request(text: str):
+    """URL, headers, payload and cache key for a non-streaming Inworld TTS call."""
+    settings = get_settings()
     url = "https://api.inworld.ai/tts/v1/voice"
     # Use Basic (base64) per provider docs
     headers_basic = {
@@ -21,9 +60,8 @@ def synthesize_inworld(text: str) -> bytes:
     }
     # Sanitize text: Inworld requires at least one Unicode letter or digit
     try:
-        import re as _re
         clean_text = (text or "").strip()
-        if not _re.search(r"\w", clean_text, flags=_re.UNICODE):
+        if not _WORD_RE.search(clean_text):
             logger.warning("TTS: text lacks letters/digits; replacing with 'Okay.'")
             clean_text = "Okay."
     except Exception:
@@ -39,123 +77,225 @@ def synthesize_inworld(text: str) -> bytes:
         "temperature": 1.1,            # From playground settings
         "talking_speed": 1.0,          # From playground settings (normal speed)
     }
+    cache_key = (payload["voiceId"], payload["modelId"], clean_text)
+    return url, headers_basic, payload, cache_key
+
+
+def _audio_from_response(data: dict, cache_key) -> bytes:
+    audio_b64 = data.get("audioContent")
+    if not audio_b64:
+        # Return mock audio to avoid breaking UX
+        logger.warning("TTS: no audioContent in response; returning mock audio")
+        return b"ID3mock-mp3"
+    audio_bytes = base64.b64decode(audio_b64)
+    logger.info(f"TTS: received {len(audio_bytes)} bytes of audio")
+    _audio_cache.put(cache_key, audio_bytes)
+    return audio_bytes
+
+
+def _log_tts_failure(r, e: Exception) -> None:
+    try:
+        # If a response was received, log a short body
+        body = r.text[:300] if r is not None and hasattr(r, 'text') else ''
+        if body:
+            logger.warning(f"TTS: last response body (truncated): {body}")
+    except Exception:
+        pass
+    logger.exception(f"TTS: exception during synthesis, returning mock: {e}")
+
+
+def synthesize_inworld(text: str) -> bytes:
+    """Call Inworld TTS and return MP3 bytes. Requires INWORLD_API_KEY (Basic base64 token)."""
+    settings = get_settings()
+    if not settings.INWORLD_API_KEY:
+        # simple mock tone if key missing
+        logger.warning("TTS: INWORLD_API_KEY missing; returning mock audio bytes")
+        return b"ID3mock-mp3"
+
+    url, headers_basic, payload, cache_key = _voice_request(text)
+    cached = _audio_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    r = None
     try:
         logger.info("TTS: calling Inworld TTS with Deborah voice and inworld-tts-1-max model")
-        r = requests.post(url, json=payload, headers=headers_basic, timeout=30)
+        r = _session.post(url, json=payload, headers=headers_basic, timeout=30)
         r.raise_for_status()
-        data = r.json()
-        audio_b64 = data.get("audioContent")
-        if not audio_b64:
-            # Return mock audio to avoid breaking UX
-            logger.warning("TTS: no audioContent in response; returning mock audio")
-            return b"ID3mock-mp3"
-        audio_bytes = base64.b64decode(audio_b64)
-        logger.info(f"TTS: received {len(audio_bytes)} bytes of audio")
-        return audio_bytes
+        return _audio_from_response(r.json(), cache_key)
     except Exception as e:
         # Return mock audio so the pipeline continues and the user still gets audio feedback
-        try:
-            # If response exists in scope, log a short body
-            body = r.text[:300] if 'r' in locals() and hasattr(r, 'text') else ''
-            if body:
-                logger.warning(f"TTS: last response body (truncated): {body}")
-        except Exception:
-            pass
-        logger.exception(f"TTS: exception during synthesis, returning mock: {e}")
+        _log_tts_failure(r, e)
+        return b"ID3mock-mp3"
+
+
+async def synthesize_inworld_async(text: str) -> bytes:
+    """Async ``synthesize_inworld`` on the shared httpx client (doesn't block the event loop)."""
+    settings = get_settings()
+    if not settings.INWORLD_API_KEY:
+        logger.warning("TTS: INWORLD_API_KEY missing; returning mock audio bytes")
         return b"ID3mock-mp3"
 
+    url, headers_basic, payload, cache_key = _voice_request(text)
+    cached = _audio_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    # Concurrent requests for the same reply share one synthesis
+    return await _syntheses_in_flight.run(
+        cache_key, lambda: _synthesize_async(url, headers_basic, payload, cache_key)
+    )
+
+
+async def _synthesize_async(url: str, headers_basic: dict, payload: dict, cache_key) -> bytes:
+    r = None
+    try:
+        logger.info("TTS: calling Inworld TTS with Deborah voice and inworld-tts-1-max model")
+        r = await _aclient.post(url, content=orjson.dumps(payload), headers=headers_basic, timeout=30)
+        r.raise_for_status()
+        return _audio_from_response(orjson.loads(r.content), cache_key)
+    except Exception as e:
+        _log_tts_failure(r, e)
+        return b"ID3mock-mp3"
+
+
+class _PcmSegmenter:
+    """Turn Inworld ``:stream`` NDJSON lines into ~0.5s WAV/PCM segments.
+
+    Following Inworld docs pattern: accumulate audio data before yielding larger
+    chunks for smoother playback. A segment starts with the WAV header of its
+    first chunk, followed by PCM; later chunks have their header stripped.
+    """
+
+    # At 48kHz 16-bit mono: ~48000 samples/sec * 2 bytes = 96000 bytes/sec
+    # So ~48000 bytes = ~0.5 seconds
+    SEGMENT_BYTES = 48000
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.header_len = 0  # 44 once the current segment's WAV header is in buf
+        self.chunk_count = 0
+
+    def feed(self, line) -> bytes | None:
+        """Add one stream line; return a finished segment when one is ready."""
+        if not line:
+            return None
+        try:
+            chunk = orjson.loads(line)
+            audio_b64 = chunk.get("result", {}).get("audioContent")
+            if not audio_b64:
+                return None
+            bs = base64.b64decode(audio_b64)
+        except Exception as e:
+            logger.warning(f"TTS stream: failed parsing chunk: {e}")
+            return None
+        self.chunk_count += 1
+
+        if not self.header_len and len(bs) > 44:
+            # Keep WAV header (and data) from the segment's first chunk
+            self.buf += bs
+            self.header_len = 44
+        else:
+            # Strip WAV header from subsequent chunks (memoryview: no slice copy)
+            self.buf += memoryview(bs)[44:] if len(bs) > 44 else bs
+
+        if len(self.buf) - self.header_len >= self.SEGMENT_BYTES:
+            return self._take()
+        return None
+
+    def flush(self) -> bytes | None:
+        """Return any remaining audio data."""
+        if len(self.buf) > self.header_len:
+            return self._take()
+        return None
+
+    def _take(self) -> bytes:
+        out = bytes(self.buf)
+        self.buf = bytearray()
+        self.header_len = 0
+        return out
+
+
+def _stream_request(text: str, sample_rate_hz: int):
+    settings = get_settings()
+    clean_text = (text or "").strip()
+    if not _WORD_RE.search(clean_text):
+        clean_text = "Okay."
+    headers = {
+        "Authorization": f"Basic {settings.INWORLD_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    # Enhanced payload with Deborah voice, latest model, and playground parameters
+    payload = {
+        "text": clean_text,
+        "voiceId": "Deborah",          # Updated from Ashley
+        "modelId": "inworld-tts-1-max", # Updated to latest model
+        "temperature": 1.1,            # From playground settings
+        "talking_speed": 1.0,          # From playground settings (normal speed)
+        "audio_config": {
+            "audio_encoding": "LINEAR16",
+            "sample_rate_hertz": sample_rate_hz,
+        },
+    }
+    return _STREAM_URL, headers, payload
+
 
 def synthesize_inworld_stream(text: str, sample_rate_hz: int = 48000):
     """Yield accumulated LINEAR16 PCM bytes from Inworld streaming TTS.
 
-    Following Inworld docs pattern: accumulate audio data before yielding larger chunks
-    for smoother playback. Yields complete audio segments instead of tiny fragments.
+    Yields complete audio segments (~0.5s) instead of tiny fragments.
+    Blocking; async callers should use ``synthesize_inworld_stream_async``.
     """
     settings = get_settings()
     if not settings.INWORLD_API_KEY:
         logger.warning("TTS stream: INWORLD_API_KEY missing; aborting")
         return
     try:
-        import json, re as _re
-        clean_text = (text or "").strip()
-        if not _re.search(r"\w", clean_text, flags=_re.UNICODE):
-            clean_text = "Okay."
-        url = "https://api.inworld.ai/tts/v1/voice:stream"
-        headers = {
-            "Authorization": f"Basic {settings.INWORLD_API_KEY}",
-            "Content-Type": "application/json",
-        }
-        # Enhanced payload with Deborah voice, latest model, and playground parameters
-        payload = {
-            "text": clean_text,
-            "voiceId": "Deborah",          # Updated from Ashley
-            "modelId": "inworld-tts-1-max", # Updated to latest model
-            "temperature": 1.1,            # From playground settings
-            "talking_speed": 1.0,          # From playground settings (normal speed)
-            "audio_config": {
-                "audio_encoding": "LINEAR16",
-                "sample_rate_hertz": sample_rate_hz,
-            },
-        }
+        url, headers, payload = _stream_request(text, sample_rate_hz)
         logger.info("TTS stream: POST :stream with Deborah voice and inworld-tts-1-max model")
-        r = requests.post(url, json=payload, headers=headers, stream=True, timeout=60)
+        r = _session.post(url, json=payload, headers=headers, stream=True, timeout=60)
         r.raise_for_status()
         
-        # Accumulate audio data like in Inworld docs
-        all_audio_data = []
-        wav_header = None
-        chunk_count = 0
-        
+        segmenter = _PcmSegmenter()
         for line in r.iter_lines():
-            if not line:
-                continue
-            try:
-                chunk = json.loads(line)
-                audio_b64 = chunk.get("result", {}).get("audioContent")
-                if not audio_b64:
-                    continue
-                    
-                bs = base64.b64decode(audio_b64)
-                chunk_count += 1
-                
-                if wav_header is None and len(bs) > 44:
-                    # Extract WAV header from first chunk
-                    wav_header = bs[:44]
-                    all_audio_data.extend(bs[44:])
-                else:
-                    # Strip WAV header from subsequent chunks
-                    audio_data = bs[44:] if len(bs) > 44 else bs
-                    all_audio_data.extend(audio_data)
+            segment = segmenter.feed(line)
+            if segment:
+                yield segment
+        segment = segmenter.flush()
+        if segment:
+            yield segment
                 
-                # Yield accumulated chunks every ~0.5 seconds worth of audio
-                # At 48kHz 16-bit mono: ~48000 samples/sec * 2 bytes = 96000 bytes/sec
-                # So ~48000 bytes = ~0.5 seconds
-                if len(all_audio_data) >= 48000:
-                    if wav_header:
-                        # Create complete WAV with header + accumulated data
-                        complete_audio = bytearray(wav_header)
-                        complete_audio.extend(all_audio_data)
-                        yield bytes(complete_audio)
-                        wav_header = None  # Only include header in first yield
-                    else:
-                        yield bytes(all_audio_data)
-                    all_audio_data = []
-                    
-            except Exception as e:
-                logger.warning(f"TTS stream: failed parsing chunk: {e}")
-                continue
-        
-        # Yield any remaining audio data
-        if all_audio_data:
-            if wav_header:
-                complete_audio = bytearray(wav_header)
-                complete_audio.extend(all_audio_data)
-                yield bytes(complete_audio)
-            else:
-                yield bytes(all_audio_data)
-                
-        logger.info(f"TTS stream: completed, processed {chunk_count} chunks")
+        logger.info(f"TTS stream: completed, processed {segmenter.chunk_count} chunks")
         
     except Exception as e:
         logger.exception(f"TTS stream: request failed: {e}")
         return
+
+
+async def synthesize_inworld_stream_async(text: str, sample_rate_hz: int = 48000):
+    """Async variant of ``synthesize_inworld_stream`` on a shared httpx.AsyncClient.
+
+    Network waits yield to the event loop, so one worker can stream TTS for
+    several sessions concurrently.
+    """
+    settings = get_settings()
+    if not settings.INWORLD_API_KEY:
+        logger.warning("TTS stream: INWORLD_API_KEY missing; aborting")
+        return
+    try:
+        url, headers, payload = _stream_request(text, sample_rate_hz)
+        logger.info("TTS stream (async): POST :stream with Deborah voice and inworld-tts-1-max model")
+        segmenter = _PcmSegmenter()
+        async with _aclient.stream("POST", url, json=payload, headers=headers) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                segment = segmenter.feed(line)
+                if segment:
+                    yield segment
+        segment = segmenter.flush()
+        if segment:
+            yield segment
+
+        logger.info(f"TTS stream (async): completed, processed {segmenter.chunk_count} chunks")
+
+    except Exception as e:
+        logger.exception(f"TTS stream (async): request failed: {e}")
+        return
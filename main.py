@@ -1,27 +1,56 @@
+import asyncio
 import base64
+import contextvars
+import functools
 import io
+import random
+import re
 import time
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Header, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+import orjson
+
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Depends, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import iterate_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 
 from app.config import get_settings
 from app.deps import verify_api_key, limiter
-from app.services.mistral import stream_generate_reply_from_audio, generate_llm_reply
+from app.services.mistral import (
+    stream_generate_reply_from_audio,
+    generate_llm_reply_async,
+    generate_llm_reply_with_tone_async,
+    stream_generate_llm_reply_async,
+    transcribe_long_audio_async,
+    shutdown_split_pool,
+    warmup as mistral_warmup,
+    warmup_async as mistral_warmup_async,
+)
 from app.services.langgraph_service import langgraph_service
-from app.services.emotion import analyze_emotion_text, analyze_emotion_audio
-from app.services.tts import synthesize_inworld, synthesize_inworld_stream
+from app.services.memory import memory_manager
+from app.services.evaluations import evaluation_manager
+from app.services.rag import get_rag_system
+from app.services.emotion import Emotion, analyze_emotion_text, analyze_emotion_audio, warmup as emotion_warmup
+from app.services.audio import audio_digest
+from app.services.tts import (
+    synthesize_inworld_async,
+    synthesize_inworld_stream_async,
+    aclose as tts_aclose,
+    warmup_async as tts_warmup_async,
+)
 from app.services.supabase import (
+    audio_file_name,
     get_supabase,
     upload_audio_and_get_url,
-    insert_emotion_score,
-    insert_conversation_session,
+    persist_conversation,
+    start_background_writer,
 )
 from dotenv import load_dotenv
 load_dotenv()
@@ -30,6 +59,7 @@ from opentelemetry import trace
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
@@ -38,7 +68,8 @@ settings = get_settings()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("sophia-backend")
 
-app = FastAPI(title=settings.APP_NAME)
+# orjson encodes the (already validated) response models in one C pass
+app = FastAPI(title=settings.APP_NAME, default_response_class=ORJSONResponse)
 
 # OpenTelemetry setup
 resource = Resource.create({
@@ -72,19 +103,35 @@ def _parse_otlp_headers(hdrs: str | None) -> dict[str, str] | None:
     return out or None
 
 
-provider = TracerProvider(resource=resource)
+# Head sampling (OTEL_TRACES_SAMPLE_RATIO, all traces by default): unsampled
+# requests get non-recording spans, so the per-stage spans and set_attribute
+# calls below cost next to nothing on the event loop
+provider = TracerProvider(
+    resource=resource,
+    sampler=ParentBased(TraceIdRatioBased(settings.OTEL_TRACES_SAMPLE_RATIO)),
+)
 
-# Configure OTLP HTTP exporter for Grafana Cloud (or any OTLP endpoint) via env
-otlp_endpoint = _normalize_otlp_endpoint(settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+# Configure OTLP exporter for Grafana Cloud (or any OTLP endpoint) via env.
+# HTTP is the default since Grafana's gateway only speaks HTTP; collectors that
+# accept gRPC can use it to export over one long-lived HTTP/2 channel.
 otlp_headers = _parse_otlp_headers(settings.OTEL_EXPORTER_OTLP_HEADERS)
+if settings.OTEL_EXPORTER_OTLP_PROTOCOL == "grpc":
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter as GrpcOTLPSpanExporter
+    otlp_endpoint = settings.OTEL_EXPORTER_OTLP_ENDPOINT or None
+    otlp_exporter_cls = GrpcOTLPSpanExporter
+else:
+    otlp_endpoint = _normalize_otlp_endpoint(settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+    otlp_exporter_cls = OTLPSpanExporter
 
 # Only enable exporter if explicitly configured to avoid connection errors to localhost
 if otlp_endpoint:
-    otlp_exporter = OTLPSpanExporter(
+    otlp_exporter = otlp_exporter_cls(
         endpoint=otlp_endpoint,
         headers=otlp_headers,
     )
-    provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
+    provider.add_span_processor(
+        BatchSpanProcessor(otlp_exporter, max_queue_size=4096, schedule_delay_millis=5000)
+    )
 else:
     # No exporter configured; traces will be kept in-process only
     pass
@@ -92,8 +139,23 @@ else:
 trace.set_tracer_provider(provider)
 tracer = trace.get_tracer("sophia")
 
-# Auto-instrument FastAPI
-FastAPIInstrumentor.instrument_app(app)
+# Auto-instrument FastAPI (health checks poll constantly and aren't worth a span)
+FastAPIInstrumentor.instrument_app(app, excluded_urls="health")
+
+class _BufferedGZipMiddleware(GZipMiddleware):
+    """GZip for regular JSON responses; streamed endpoints pass through untouched
+    so the compressor can't hold back tokens/SSE events until its buffer fills."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# /defi-chat and /text-chat bodies carry memory and evaluation logs; compress
+# anything over 1 KB for clients that send Accept-Encoding: gzip
+app.add_middleware(_BufferedGZipMiddleware, minimum_size=1024, compresslevel=5)
 
 app.add_middleware(
     CORSMiddleware,
@@ -117,15 +179,63 @@ if os.path.exists("frontend"):
 else:
     print("ℹ️ Frontend directory not found - running in backend-only mode (frontend served by Vercel)")
 
+# Blocking SDK calls get their own bounded pools, so a burst of slow storage
+# uploads can't queue emotion analysis (or LangGraph runs on the default
+# executor) behind it, and vice versa
+_upload_pool = ThreadPoolExecutor(max_workers=settings.UPLOAD_POOL_SIZE, thread_name_prefix="upload")
+_emotion_pool = ThreadPoolExecutor(max_workers=settings.EMOTION_POOL_SIZE, thread_name_prefix="emotion")
+
+
+async def _run_in(pool: ThreadPoolExecutor, fn, *args):
+    # Like asyncio.to_thread (including contextvars, so spans nest) but on a chosen pool
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(pool, functools.partial(ctx.run, fn, *args))
+
+
+def _prewarm_models():
+    try:
+        get_rag_system()
+    except Exception as e:
+        logger.warning(f"RAG warmup failed: {e}")
+    emotion_warmup()
+
+
+@app.on_event("startup")
+def warm_llm_connections():
+    # Run in the background so startup (and health checks) aren't delayed
+    import threading
+    threading.Thread(target=mistral_warmup, name="mistral-warmup", daemon=True).start()
+    # Load the RAG encoder / FAQ matrix and the emotion classifier's imports now
+    # rather than inside the first request
+    threading.Thread(target=_prewarm_models, name="model-warmup", daemon=True).start()
+    # Supabase rows are written off the request path by this thread
+    start_background_writer()
+
+
+@app.on_event("startup")
+async def warm_async_clients():
+    # The handlers' async clients keep their own pools; open them too, without
+    # holding up startup. Keep a reference so the task isn't collected early.
+    app.state.client_warmup = asyncio.gather(mistral_warmup_async(), tts_warmup_async())
+
+
+@app.on_event("shutdown")
+def stop_worker_pools():
+    _upload_pool.shutdown(wait=False)
+    _emotion_pool.shutdown(wait=False)
+    shutdown_split_pool()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await tts_aclose()
+
+
 # Simple health endpoint for Fly.io checks and container orchestration
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-class Emotion(BaseModel):
-    label: str
-    confidence: float
-
 class TranscriptionResponse(BaseModel):
     text: str
     emotion: Emotion
@@ -139,6 +249,7 @@ class SynthesizeResponse(BaseModel):
     emotion: Emotion
 
 class ChatResponse(BaseModel):
+    session_id: Optional[str] = None
     transcript: str
     reply: str
     user_emotion: Emotion
@@ -188,35 +299,92 @@ def api_root():
     return {"message": "Sophia AI Backend with DeFi Agent is running."}
 
 
+_UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+# Sentence boundary for incremental TTS: whitespace after ., ! or ?
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+ALLOWED_AUDIO_EXTENSIONS = frozenset({'wav', 'webm', 'mp3', 'mp4', 'ogg', 'flac', 'm4a', 'aac'})
+_UNSUPPORTED_AUDIO_DETAIL = (
+    "File must be an audio file. Supported formats: "
+    + ", ".join(f".{ext}" for ext in sorted(ALLOWED_AUDIO_EXTENSIONS))
+)
+
+
+def _is_audio_filename(filename: str | None) -> bool:
+    # One hash lookup on the suffix after the last dot
+    return (filename or "").rpartition(".")[2].lower() in ALLOWED_AUDIO_EXTENSIONS
+
+
+def _resolve_session_id(session_id: str | None) -> str:
+    # Reuse the client's id for follow-up turns, in canonical string form;
+    # reject malformed ids here rather than failing later at the DB insert
+    if not session_id:
+        return str(uuid.uuid4())
+    try:
+        return str(uuid.UUID(session_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="session_id must be a UUID")
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    """Read an uploaded audio file in 1 MB chunks, rejecting oversized uploads early.
+
+    Starlette already spools multipart uploads to disk past 1 MB; reading in
+    chunks keeps us from buffering more than MAX_UPLOAD_BYTES of a bad upload.
+    When the size is known up front it is checked first and the file is read
+    in one call, skipping the chunk list and the extra copy from joining it.
+    """
+    limit = settings.MAX_UPLOAD_BYTES
+    if file.size is not None:
+        if file.size > limit:
+            raise HTTPException(status_code=413, detail="Audio file too large")
+        return await file.read()
+    chunks = []
+    total = 0
+    while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+        total += len(chunk)
+        if total > limit:
+            raise HTTPException(status_code=413, detail="Audio file too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
 @app.post("/transcribe", response_model=TranscriptionResponse)
 @limiter.limit(settings.API_RATE_LIMIT)
 async def transcribe(
     request: Request,
     file: UploadFile = File(...),
+    session_id: Optional[str] = Form(None),
     api_key_ok: None = Depends(verify_api_key),
 ):
     # Accept common audio formats
-    allowed_extensions = ['.wav', '.webm', '.mp3', '.mp4', '.ogg', '.flac', '.m4a', '.aac']
-    if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
-        raise HTTPException(status_code=400, detail=f"File must be an audio file. Supported formats: {', '.join(allowed_extensions)}")
+    if not _is_audio_filename(file.filename):
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_AUDIO_DETAIL)
 
-    session_id = uuid.uuid4()
+    session_id = _resolve_session_id(session_id)
+    wav_bytes = await _read_upload(file)
 
+    # Emotion analysis doesn't need the transcript; overlap it with STT.
+    # Both key their caches on the same digest, hashed once here.
+    digest = audio_digest(wav_bytes)
+    emotion_task = asyncio.create_task(_run_in(_emotion_pool, analyze_emotion_audio, wav_bytes, digest))
     try:
-        wav_bytes = await file.read()
-        text = transcribe_audio_with_voxtral(wav_bytes)
+        text = await transcribe_long_audio_async(wav_bytes, digest)
     except Exception as e:
+        emotion_task.cancel()
         logger.exception("Transcription failed")
         raise HTTPException(status_code=500, detail="Transcription failed")
 
-    user_emotion = analyze_emotion_audio(wav_bytes)
+    user_emotion = await emotion_task
 
-    try:
-        insert_emotion_score(session_id, role="user", emotion=user_emotion)
-    except Exception:
-        logger.warning("Failed to persist user emotion score; continuing")
+    # emotion_scores rows reference a conversation_sessions row, so record the
+    # utterance as a (reply-less) turn of the session and hang the score off it
+    persist_conversation(session_id, transcript=text, reply=None, user_emotion=user_emotion)
 
-    return TranscriptionResponse(text=text, emotion=user_emotion.model_dump())
+    return TranscriptionResponse(text=text, emotion=user_emotion)
 
 
 class GenerateRequest(BaseModel):
@@ -230,7 +398,7 @@ async def generate_response(
     api_key_ok: None = Depends(verify_api_key),
 ):
     try:
-        reply = generate_llm_reply(body.text)
+        reply = await generate_llm_reply_async(body.text)
     except Exception:
         logger.exception("LLM response generation failed")
         raise HTTPException(status_code=500, detail="Response generation failed")
@@ -252,7 +420,7 @@ async def generate_response_stream(
     first token and incremental updates.
     """
     try:
-        generator = stream_generate_llm_reply(body.text)
+        generator = stream_generate_llm_reply_async(body.text)
         return StreamingResponse(generator, media_type="text/plain")
     except Exception:
         logger.exception("Streaming response generation failed")
@@ -270,28 +438,27 @@ async def synthesize(
     api_key_ok: None = Depends(verify_api_key),
 ):
     try:
-        audio_bytes = synthesize_inworld(body.text)
+        audio_bytes = await synthesize_inworld_async(body.text)
     except Exception:
         logger.exception("TTS synthesis failed")
         raise HTTPException(status_code=500, detail="Synthesis failed")
 
+    # Emotion analysis only needs the audio bytes, so run it alongside the upload
+    digest = audio_digest(audio_bytes)
+    emotion_task = asyncio.create_task(_run_in(_emotion_pool, analyze_emotion_audio, audio_bytes, digest))
     try:
-        file_name = f"sophia_{int(time.time()*1000)}.mp3"
+        file_name = audio_file_name()
         # Fix argument order: first bytes, then optional file_name
-        audio_url = upload_audio_and_get_url(audio_bytes, file_name)
+        audio_url = await _run_in(_upload_pool, upload_audio_and_get_url, audio_bytes, file_name, digest)
     except Exception:
         logger.exception("Audio upload failed")
         raise HTTPException(status_code=500, detail="Audio upload failed")
 
-    sophia_emotion = analyze_emotion_audio(audio_bytes)
-
-    try:
-        session_id = uuid.uuid4()
-        insert_emotion_score(session_id, role="sophia", emotion=sophia_emotion)
-    except Exception:
-        logger.warning("Failed to persist sophia emotion score; continuing")
+    sophia_emotion = await emotion_task
 
-    return SynthesizeResponse(audio_url=audio_url, emotion=sophia_emotion.model_dump())
+    # No conversation session exists for a bare synthesis, and emotion_scores
+    # rows must reference one, so nothing is persisted here
+    return SynthesizeResponse(audio_url=audio_url, emotion=sophia_emotion)
 
 
 @app.post("/chat", response_model=ChatResponse)
@@ -299,98 +466,132 @@ async def synthesize(
 async def chat(
     request: Request,
     file: UploadFile = File(...),
+    session_id: Optional[str] = Form(None),
     api_key_ok: None = Depends(verify_api_key),
 ):
     # Accept common audio formats
-    allowed_extensions = ['.wav', '.webm', '.mp3', '.mp4', '.ogg', '.flac', '.m4a', '.aac']
-    if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
-        raise HTTPException(status_code=400, detail=f"File must be an audio file. Supported formats: {', '.join(allowed_extensions)}")
+    if not _is_audio_filename(file.filename):
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_AUDIO_DETAIL)
 
-    session_id = uuid.uuid4()
+    # String form once; it's what the span, DB rows and FK references all use
+    session_id = _resolve_session_id(session_id)
+    wav_bytes = await _read_upload(file)
 
     with tracer.start_as_current_span("chat") as chat_span:
-        chat_span.set_attribute("session.id", str(session_id))
-        t0 = time.time()
+        chat_span.set_attribute("session.id", session_id)
+        t0_ns = time.monotonic_ns()
+        # STT and emotion key their caches on the same digest; hash the clip once
+        wav_digest = audio_digest(wav_bytes)
+        async def _user_emotion():
+            with tracer.start_as_current_span("emotion_analysis_user") as emotion_span:
+                user_emotion = await _run_in(_emotion_pool, analyze_emotion_audio, wav_bytes, wav_digest)
+                if emotion_span.is_recording():
+                    emotion_span.set_attributes({
+                        "phoenix_user_emotion.label": user_emotion.label,
+                        "phoenix_user_emotion.confidence": float(user_emotion.confidence),
+                        "emotion.type": "user",
+                        "emotion.source": "audio",
+                    })
+            return user_emotion
+
+        async def _sophia_emotion(audio_bytes: bytes, digest: bytes):
+            with tracer.start_as_current_span("emotion_analysis_sophia") as sophia_emotion_span:
+                sophia_emotion = await _run_in(_emotion_pool, analyze_emotion_audio, audio_bytes, digest)
+                if sophia_emotion_span.is_recording():
+                    sophia_emotion_span.set_attributes({
+                        "phoenix_sophia_emotion.label": sophia_emotion.label,
+                        "phoenix_sophia_emotion.confidence": float(sophia_emotion.confidence),
+                        "emotion.type": "sophia",
+                        "emotion.source": "audio",
+                    })
+            return sophia_emotion
+
+        async def _reply_and_speech():
+            try:
+                with tracer.start_as_current_span("llm_generation") as llm_span:
+                    reply, tone = await generate_llm_reply_with_tone_async(transcript)
+                    llm_span.set_attribute("reply.length", len(reply))
+            except Exception:
+                logger.exception("LLM generation failed in chat")
+                raise HTTPException(status_code=500, detail="Response generation failed")
+
+            try:
+                with tracer.start_as_current_span("tts_synthesis_upload") as tts_span:
+                    audio_bytes = await synthesize_inworld_async(reply)
+                    audio_bytes_digest = audio_digest(audio_bytes)
+                    file_name = audio_file_name()
+                    if tone and random.random() >= settings.SOPHIA_AUDIO_EMOTION_SAMPLE_RATE:
+                        # The LLM already told us the tone it wrote; no need to
+                        # re-derive it from the synthesized audio
+                        audio_url = await _run_in(
+                            _upload_pool, upload_audio_and_get_url, audio_bytes, file_name, audio_bytes_digest
+                        )
+                        sophia_emotion = Emotion(label=tone, confidence=1.0)
+                    else:
+                        # Sophia's emotion only needs the audio bytes; analyze while uploading
+                        audio_url, sophia_emotion = await asyncio.gather(
+                            _run_in(_upload_pool, upload_audio_and_get_url, audio_bytes, file_name, audio_bytes_digest),
+                            _sophia_emotion(audio_bytes, audio_bytes_digest),
+                        )
+                        if tone:
+                            # Sampled drift check: does the voice still carry the tone the LLM wrote?
+                            drift = sophia_emotion.label != tone
+                            tts_span.set_attributes({"sophia_tone.llm": tone, "sophia_tone.drift": drift})
+                            if drift:
+                                logger.warning(
+                                    f"Sophia tone drift in session {session_id}: LLM wrote {tone}, "
+                                    f"audio classified {sophia_emotion.label}"
+                                )
+            except Exception:
+                logger.exception("Synthesis or upload failed in chat")
+                raise HTTPException(status_code=500, detail="Synthesis failed")
+            return reply, audio_url, sophia_emotion
+
+        # User-emotion analysis only needs the uploaded audio, so it runs
+        # alongside the whole STT -> LLM -> TTS chain
+        user_emotion_task = asyncio.create_task(_user_emotion())
         try:
-            wav_bytes = await file.read()
             with tracer.start_as_current_span("stt_transcription") as stt_span:
-                transcript = transcribe_audio_with_voxtral(wav_bytes)
+                transcript = await transcribe_long_audio_async(wav_bytes, wav_digest)
                 stt_span.set_attribute("transcript.length", len(transcript))
         except Exception:
+            user_emotion_task.cancel()
             logger.exception("Transcription failed in chat")
             raise HTTPException(status_code=500, detail="Transcription failed")
 
-        with tracer.start_as_current_span("emotion_analysis_user") as emotion_span:
-            user_emotion = analyze_emotion_audio(wav_bytes)
-            emotion_span.set_attribute("phoenix_user_emotion.label", user_emotion.label)
-            emotion_span.set_attribute("phoenix_user_emotion.confidence", float(user_emotion.confidence))
-            emotion_span.set_attribute("emotion.type", "user")
-            emotion_span.set_attribute("emotion.source", "audio")
-        
-        chat_span.set_attribute("phoenix_user_emotion.label", user_emotion.label)
-        chat_span.set_attribute("phoenix_user_emotion.confidence", float(user_emotion.confidence))
-        # Defer emotion persistence until after conversation session is created to avoid FK issues
-
         try:
-            with tracer.start_as_current_span("llm_generation") as llm_span:
-                reply = generate_llm_reply(transcript)
-                llm_span.set_attribute("reply.length", len(reply))
-        except Exception:
-            logger.exception("LLM generation failed in chat")
-            raise HTTPException(status_code=500, detail="Response generation failed")
-
-        try:
-            with tracer.start_as_current_span("tts_synthesis_upload"):
-                audio_bytes = synthesize_inworld(reply)
-                file_name = f"sophia_{int(time.time()*1000)}.mp3"
-                # Fix argument order: first bytes, then optional file_name
-                audio_url = upload_audio_and_get_url(audio_bytes, file_name)
-        except Exception:
-            logger.exception("Synthesis or upload failed in chat")
-            raise HTTPException(status_code=500, detail="Synthesis failed")
-
-        with tracer.start_as_current_span("emotion_analysis_sophia") as sophia_emotion_span:
-            sophia_emotion = analyze_emotion_audio(audio_bytes)
-            sophia_emotion_span.set_attribute("phoenix_sophia_emotion.label", sophia_emotion.label)
-            sophia_emotion_span.set_attribute("phoenix_sophia_emotion.confidence", float(sophia_emotion.confidence))
-            sophia_emotion_span.set_attribute("emotion.type", "sophia")
-            sophia_emotion_span.set_attribute("emotion.source", "audio")
-        
-        chat_span.set_attribute("phoenix_sophia_emotion.label", sophia_emotion.label)
-        chat_span.set_attribute("phoenix_sophia_emotion.confidence", float(sophia_emotion.confidence))
-        # Defer emotion persistence until after conversation session is created to avoid FK issues
-
-        total_ms = int((time.time() - t0) * 1000)
-        chat_span.set_attribute("total_roundtrip_time.ms", total_ms)
+            reply, audio_url, sophia_emotion = await _reply_and_speech()
+        except BaseException:
+            # Don't leave the emotion call running with nobody to collect its result
+            user_emotion_task.cancel()
+            raise
+        user_emotion = await user_emotion_task
+
+        # Unsampled requests get a non-recording span; skip building attributes for it
+        if chat_span.is_recording():
+            chat_span.set_attributes({
+                "phoenix_user_emotion.label": user_emotion.label,
+                "phoenix_user_emotion.confidence": float(user_emotion.confidence),
+                "phoenix_sophia_emotion.label": sophia_emotion.label,
+                "phoenix_sophia_emotion.confidence": float(sophia_emotion.confidence),
+                "total_roundtrip_time.ms": (time.monotonic_ns() - t0_ns) // 1_000_000,
+            })
 
-    # Insert conversation first (let DB set timestamps), then emotion scores to satisfy FK
-    try:
-        insert_conversation_session({
-            "id": str(session_id),
-            "transcript": transcript,
-            "reply": reply,
-            "user_emotion_label": user_emotion.label,
-            "user_emotion_confidence": user_emotion.confidence,
-            "sophia_emotion_label": sophia_emotion.label,
-            "sophia_emotion_confidence": sophia_emotion.confidence,
-            "audio_url": audio_url or None,
-        })
-        try:
-            insert_emotion_score(session_id, role="user", emotion=user_emotion)
-        except Exception:
-            logger.warning("Persist user emotion failed; continuing")
-        try:
-            insert_emotion_score(session_id, role="sophia", emotion=sophia_emotion)
-        except Exception:
-            logger.warning("Persist sophia emotion failed; continuing")
-    except Exception:
-        logger.warning("Persist conversation session failed; continuing")
+    persist_conversation(
+        session_id,
+        transcript=transcript,
+        reply=reply,
+        user_emotion=user_emotion,
+        sophia_emotion=sophia_emotion,
+        audio_url=audio_url,
+    )
 
     return ChatResponse(
+        session_id=session_id,
         transcript=transcript,
         reply=reply,
-        user_emotion=user_emotion.model_dump(),
-        sophia_emotion=sophia_emotion.model_dump(),
+        user_emotion=user_emotion,
+        sophia_emotion=sophia_emotion,
         audio_url=audio_url,
     )
 
@@ -401,49 +602,38 @@ async def defi_chat(
     request: Request,
     file: UploadFile = File(...),
     session_id: Optional[str] = None,
+    session_id_form: Optional[str] = Form(None, alias="session_id"),
     api_key_ok: None = Depends(verify_api_key),
 ):
     """Enhanced chat endpoint using LangGraph for DeFi conversations"""
     
     # Accept common audio formats
-    allowed_extensions = ['.wav', '.webm', '.mp3', '.mp4', '.ogg', '.flac', '.m4a', '.aac']
-    if not any(file.filename.lower().endswith(ext) for ext in allowed_extensions):
-        raise HTTPException(status_code=400, detail=f"File must be an audio file. Supported formats: {', '.join(allowed_extensions)}")
+    if not _is_audio_filename(file.filename):
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_AUDIO_DETAIL)
+
+    # The web client sends session_id as a form field; older callers use the query string
+    session_id = _resolve_session_id(session_id_form or session_id)
+    wav_bytes = await _read_upload(file)
 
     try:
-        wav_bytes = await file.read()
-        
-        # Process through LangGraph pipeline
-        result = langgraph_service.process_conversation(
+        # Process through LangGraph pipeline (blocking; keep it off the event loop)
+        result = await asyncio.to_thread(
+            langgraph_service.process_conversation,
             audio_bytes=wav_bytes,
             session_id=session_id,
             collect_evaluation_data=True
         )
         
-        # Store in Supabase (let DB set timestamps). Insert conversation first, then emotions.
-        try:
-            insert_conversation_session({
-                "id": result["session_id"],
-                "transcript": result["transcript"],
-                "reply": result["reply"],
-                "user_emotion_label": result["user_emotion"]["label"],
-                "user_emotion_confidence": result["user_emotion"]["confidence"],
-                "sophia_emotion_label": result["sophia_emotion"]["label"],
-                "sophia_emotion_confidence": result["sophia_emotion"]["confidence"],
-                "audio_url": result["audio_url"] or None,
-                "intent": result["intent"],
-                "context_memory": str(result["context_memory"]),
-            })
-            try:
-                insert_emotion_score(result["session_id"], role="user", emotion=type("E", (), result["user_emotion"])())
-            except Exception as e:
-                logger.warning(f"Failed to persist user emotion: {e}")
-            try:
-                insert_emotion_score(result["session_id"], role="sophia", emotion=type("E", (), result["sophia_emotion"])())
-            except Exception as e:
-                logger.warning(f"Failed to persist sophia emotion: {e}")
-        except Exception as e:
-            logger.warning(f"Failed to persist conversation session: {e}")
+        persist_conversation(
+            result["session_id"],
+            transcript=result["transcript"],
+            reply=result["reply"],
+            user_emotion=result["user_emotion"],
+            sophia_emotion=result["sophia_emotion"],
+            audio_url=result["audio_url"],
+            intent=result["intent"],
+            context_memory=orjson.dumps(result["context_memory"]).decode(),
+        )
         
         return DefiChatResponse(**result)
         
@@ -458,6 +648,7 @@ async def defi_chat_stream(
     request: Request,
     file: UploadFile = File(...),
     session_id: Optional[str] = None,
+    session_id_form: Optional[str] = Form(None, alias="session_id"),
     api_key_ok: None = Depends(verify_api_key),
 ):
     """Streaming variant of DeFi chat.
@@ -468,47 +659,71 @@ async def defi_chat_stream(
     - event: reply_done, data: { reply }
     - event: audio_url, data: { audio_url, sophia_emotion }
     """
+    session_id = _resolve_session_id(session_id_form or session_id)
     # IMPORTANT: Read the uploaded file BEFORE starting the generator.
     # Starlette may close the underlying SpooledTemporaryFile once the coroutine
     # returns control, which would make subsequent reads fail within the
     # generator with "I/O operation on closed file".
-    wav_bytes = await file.read()
+    wav_bytes = await _read_upload(file)
 
     async def event_generator():
-        nonlocal session_id
+        tts_tasks = []
         try:
             # STT
-            transcript = transcribe_audio_with_voxtral(wav_bytes)
-            user_emotion = analyze_emotion_audio(wav_bytes)
-            if session_id is None:
-                session_id_local = str(uuid.uuid4())
-                session_id = session_id_local
-            else:
-                session_id_local = session_id
+            wav_digest = audio_digest(wav_bytes)
+            emotion_task = asyncio.create_task(_run_in(_emotion_pool, analyze_emotion_audio, wav_bytes, wav_digest))
+            try:
+                transcript = await transcribe_long_audio_async(wav_bytes, wav_digest)
+            except BaseException:
+                # Don't leave the emotion call running with nobody to collect its result
+                emotion_task.cancel()
+                raise
+            user_emotion = await emotion_task
             # Do NOT persist emotions yet; insert conversation first to satisfy FK
 
             # Send transcript event
-            import json as _json
-            yield f"event: transcript\ndata: {_json.dumps({'transcript': transcript, 'user_emotion': user_emotion.model_dump(), 'session_id': session_id_local})}\n\n"
+            yield f"event: transcript\ndata: {orjson.dumps({'transcript': transcript, 'user_emotion': user_emotion.model_dump(), 'session_id': session_id}).decode()}\n\n"
 
-            # Stream LLM
+            # Stream LLM; each finished sentence starts synthesizing while the
+            # rest of the reply is still decoding
             reply_accum = []
-            for chunk in stream_generate_llm_reply(transcript):
+            pending = ""
+            async for chunk in stream_generate_llm_reply_async(transcript):
                 if not chunk:
                     continue
                 reply_accum.append(chunk)
+                pending += chunk
+                *sentences, pending = _SENTENCE_BREAK_RE.split(pending)
+                tts_tasks.extend(
+                    asyncio.create_task(synthesize_inworld_async(sentence))
+                    for sentence in sentences if sentence.strip()
+                )
                 # stream token chunk
                 safe_chunk = chunk.replace("\n", " ")
                 yield f"event: token\ndata: {safe_chunk}\n\n"
+            if pending.strip():
+                tts_tasks.append(asyncio.create_task(synthesize_inworld_async(pending)))
 
             reply = "".join(reply_accum).strip()
-            yield f"event: reply_done\ndata: {{\"reply\": { _json.dumps(reply) }}}\n\n"
+            yield f"event: reply_done\ndata: {orjson.dumps({'reply': reply}).decode()}\n\n"
 
-            # Synthesize TTS and upload
+            # Collect the TTS segments and upload
+            emotion_task = None
             try:
-                audio_bytes = synthesize_inworld(reply)
-                file_name = f"sophia_{int(time.time()*1000)}.mp3"
-                audio_url = upload_audio_and_get_url(audio_bytes, file_name)
+                segments = await asyncio.gather(*tts_tasks, return_exceptions=True)
+                if not segments or any(
+                    isinstance(seg, BaseException) or seg.startswith(b"ID3mock") for seg in segments
+                ):
+                    # A failed sentence would leave a gap; synthesize the whole reply instead
+                    audio_bytes = await synthesize_inworld_async(reply)
+                else:
+                    # MP3 is a sequence of self-contained frames, so segments concatenate
+                    audio_bytes = b"".join(segments)
+                file_name = audio_file_name()
+                digest = audio_digest(audio_bytes)
+                # Sophia's emotion only needs the audio bytes; analyze while uploading
+                emotion_task = asyncio.create_task(_run_in(_emotion_pool, analyze_emotion_audio, audio_bytes, digest))
+                audio_url = await _run_in(_upload_pool, upload_audio_and_get_url, audio_bytes, file_name, digest)
             except Exception:
                 logger.exception("Synthesis or upload failed in defi_chat_stream")
                 audio_url = None
@@ -523,42 +738,34 @@ async def defi_chat_stream(
                         mock_audio = audio_bytes.startswith(b"ID3mock") or len(audio_bytes) < 2048
                     except Exception:
                         mock_audio = False
-                    sophia_emotion = analyze_emotion_audio(audio_bytes)
+                    sophia_emotion = await emotion_task
+                elif emotion_task is not None:
+                    emotion_task.cancel()
             except Exception:
                 logger.warning("Sophia emotion analysis failed; continuing")
 
-            # Persist conversation first (no explicit created_at), then emotions to satisfy FK
-            try:
-                insert_conversation_session({
-                    "id": session_id_local,
-                    "transcript": transcript,
-                    "reply": reply,
-                    "user_emotion_label": user_emotion.label,
-                    "user_emotion_confidence": user_emotion.confidence,
-                    "sophia_emotion_label": (sophia_emotion.label if sophia_emotion else None),
-                    "sophia_emotion_confidence": (sophia_emotion.confidence if sophia_emotion else None),
-                    "audio_url": audio_url or None,
-                })
-                try:
-                    insert_emotion_score(session_id_local, role="user", emotion=user_emotion)
-                except Exception as e:
-                    logger.warning(f"Failed to persist user emotion: {e}")
-                try:
-                    if sophia_emotion:
-                        insert_emotion_score(session_id_local, role="sophia", emotion=sophia_emotion)
-                except Exception as e:
-                    logger.warning(f"Failed to persist sophia emotion: {e}")
-            except Exception as e:
-                logger.warning(f"Failed to persist conversation session (stream): {e}")
+            persist_conversation(
+                session_id,
+                transcript=transcript,
+                reply=reply,
+                user_emotion=user_emotion,
+                sophia_emotion=sophia_emotion,
+                audio_url=audio_url,
+            )
 
             # Send audio URL and sophia emotion
             payload = {"audio_url": audio_url, "sophia_emotion": (sophia_emotion.model_dump() if sophia_emotion else None), "mock_audio": mock_audio}
-            yield f"event: audio_url\ndata: {_json.dumps(payload)}\n\n"
+            yield f"event: audio_url\ndata: {orjson.dumps(payload).decode()}\n\n"
 
         except Exception as e:
             logger.exception("Streaming DeFi chat failed")
             # Send an error event to client
             yield f"event: error\ndata: {{\"detail\": \"{str(e)}\"}}\n\n"
+        finally:
+            # Client disconnects close the generator mid-stream; stop paying for
+            # sentence audio nobody will hear
+            for task in tts_tasks:
+                task.cancel()
 
     return StreamingResponse(
         event_generator(),
@@ -591,8 +798,7 @@ def _wav_header_pcm16(num_samples: int, sample_rate: int = 16000, num_channels:
     ])
 
 async def _ws_send_json(ws: WebSocket, obj: dict):
-    import json as _json
-    await ws.send_text(_json.dumps(obj))
+    await ws.send_text(orjson.dumps(obj).decode())
 
 def _avg_abs_pcm16(buf: bytes) -> float:
     if not buf:
@@ -619,7 +825,7 @@ async def ws_voice(websocket: WebSocket):
     pcm_buffer = bytearray()
     partial_transcript = ""
     last_partial_emit = 0.0
-    last_voice_activity = time.time()
+    last_voice_activity = time.monotonic()
     in_speech = False
     utter_start_pos = 0
     # Live-mode summary state for end-of-call persistence
@@ -640,7 +846,7 @@ async def ws_voice(websocket: WebSocket):
                 # User doesn't need to see transcription, just fast response
 
                 # Simple amplitude-based VAD
-                now = time.time()
+                now = time.monotonic()
                 recent = pcm_buffer[-SILENCE_BYTES:] if len(pcm_buffer) > SILENCE_BYTES else pcm_buffer
                 amp = _avg_abs_pcm16(recent)
                 if amp > SILENCE_THRESHOLD:
@@ -662,7 +868,9 @@ async def ws_voice(websocket: WebSocket):
                     reply_tokens = []
                     tokens_sent = 0
                     try:
-                        for tok in langgraph_service.stream_conversation_response(wav_utter):
+                        # The SDK stream is synchronous; pull each token on a worker thread
+                        # so waiting on Voxtral doesn't stall every other connection
+                        async for tok in iterate_in_threadpool(langgraph_service.stream_conversation_response(wav_utter)):
                             if not tok:
                                 continue
                             reply_tokens.append(tok)
@@ -703,19 +911,31 @@ async def ws_voice(websocket: WebSocket):
 
                     # Streaming TTS: split reply into short sentences; for each sentence synthesize once
                     # and emit base64 audio chunks immediately. Also keep URL events for backward compat.
-                    import re
-                    sentences = [s.strip() for s in re.split(r"(?<=[\.!?])\s+", reply_full) if s.strip()]
+                    sentences = [s.strip() for s in _SENTENCE_BREAK_RE.split(reply_full) if s.strip()]
                     audio_url_last = None
+                    upload_tasks = []
+
+                    async def _upload_sentence_audio(audio_bytes: bytes) -> Optional[str]:
+                        # Runs alongside synthesis of the next sentence so storage latency
+                        # never delays audio the client is waiting to play.
+                        try:
+                            audio_url_chunk = await _run_in(_upload_pool, upload_audio_and_get_url, audio_bytes, audio_file_name())
+                            logger.info(f"WS: uploaded audio chunk -> {audio_url_chunk}")
+                            await _ws_send_json(websocket, {"type": "audio_url_chunk", "audio_url": audio_url_chunk})
+                            return audio_url_chunk
+                        except Exception:
+                            logger.warning("WS: upload of TTS sentence failed; continuing with streamed chunks only")
+                            return None
+
                     for i, sent in enumerate(sentences):
                         try:
                             logger.info(f"WS: TTS streaming for sentence {i+1}/{len(sentences)}, len={len(sent)}")
-                            import base64 as _b64
                             streamed_any = False
                             try:
                                 # Stream each sentence as individual audio chunks
-                                for pcm_chunk in synthesize_inworld_stream(sent, sample_rate_hz=48000) or []:
+                                async for pcm_chunk in synthesize_inworld_stream_async(sent, sample_rate_hz=48000):
                                     streamed_any = True
-                                    b64 = _b64.b64encode(pcm_chunk).decode('ascii')
+                                    b64 = base64.b64encode(pcm_chunk).decode('ascii')
                                     # audio/wav because first chunk includes WAV header, subsequent are PCM
                                     await _ws_send_json(websocket, {"type": "audio_chunk", "mime": "audio/wav", "b64": b64, "eos": False})
                             except Exception:
@@ -724,23 +944,16 @@ async def ws_voice(websocket: WebSocket):
                             if not streamed_any:
                                 # Fallback: synthesize whole sentence as complete audio
                                 try:
-                                    audio_bytes = synthesize_inworld(sent)
+                                    audio_bytes = await synthesize_inworld_async(sent)
                                     mock_check = str(audio_bytes).startswith("b'ID3mock")
                                     logger.info(f"WS: fallback TTS bytes={len(audio_bytes)} (mock={mock_check})")
                                     
                                     # Send complete sentence audio as single chunk for immediate playback
-                                    b64 = _b64.b64encode(audio_bytes).decode('ascii')
+                                    b64 = base64.b64encode(audio_bytes).decode('ascii')
                                     await _ws_send_json(websocket, {"type": "audio_chunk", "mime": "audio/mpeg", "b64": b64, "eos": False})
                                     
                                     # Also upload the full sentence MP3 to storage (optional/back-compat)
-                                    try:
-                                        file_name = f"sophia_{int(time.time()*1000)}.mp3"
-                                        audio_url_chunk = upload_audio_and_get_url(audio_bytes, file_name)
-                                        audio_url_last = audio_url_chunk
-                                        logger.info(f"WS: uploaded audio chunk -> {audio_url_chunk}")
-                                        await _ws_send_json(websocket, {"type": "audio_url_chunk", "audio_url": audio_url_chunk})
-                                    except Exception:
-                                        logger.warning("WS: upload of TTS sentence failed; continuing with streamed chunks only")
+                                    upload_tasks.append(asyncio.create_task(_upload_sentence_audio(audio_bytes)))
                                 except Exception as e:
                                     logger.error(f"WS: fallback TTS synthesis failed for sentence: {e}")
                         except Exception:
@@ -749,6 +962,8 @@ async def ws_voice(websocket: WebSocket):
                     
                     # Signal end-of-stream for this reply's audio
                     await _ws_send_json(websocket, {"type": "audio_chunk", "mime": "audio/wav", "b64": "", "eos": True})
+                    for audio_url_chunk in await asyncio.gather(*upload_tasks):
+                        audio_url_last = audio_url_chunk or audio_url_last
                     # Also send final audio_url for compatibility
                     await _ws_send_json(websocket, {"type": "audio_url", "audio_url": audio_url_last})
 
@@ -775,15 +990,15 @@ async def ws_voice(websocket: WebSocket):
             pass
 
     # Persist a single conversation summary at hangup (best-effort, no emotions to keep it fast)
-    try:
-        if last_final_text or last_reply_text:
-            insert_conversation_session({
-                "transcript": last_final_text,
-                "reply": last_reply_text,
-                "audio_url": last_audio_url or None,
-            })
-    except Exception:
-        pass
+    if last_final_text or last_reply_text:
+        persist_conversation(
+            None,
+            transcript=last_final_text,
+            reply=last_reply_text,
+            audio_url=last_audio_url,
+        )
+
+
 @app.post("/text-chat", response_model=DefiChatResponse)
 @limiter.limit(settings.API_RATE_LIMIT)
 async def text_chat(
@@ -792,35 +1007,27 @@ async def text_chat(
     api_key_ok: None = Depends(verify_api_key),
 ):
     """Text-only chat endpoint for DeFi conversations"""
+    session_id = _resolve_session_id(body.session_id)
     
     try:
         # Process text message directly through LangGraph with text input
-        result = langgraph_service.process_text_conversation(
+        result = await asyncio.to_thread(
+            langgraph_service.process_text_conversation,
             message=body.message,
-            session_id=body.session_id,
+            session_id=session_id,
             collect_evaluation_data=True
         )
         
-        # Store in Supabase (let DB set timestamps). Insert conversation first, then emotions.
-        try:
-            insert_conversation_session({
-                "id": result["session_id"],
-                "transcript": result["transcript"],
-                "reply": result["reply"],
-                "audio_url": result["audio_url"] or None,
-                "intent": result["intent"],
-                "context_memory": str(result["context_memory"]),
-            })
-            try:
-                insert_emotion_score(result["session_id"], role="user", emotion=type("E", (), result["user_emotion"])())
-            except Exception as e:
-                logger.warning(f"Failed to persist user emotion: {e}")
-            try:
-                insert_emotion_score(result["session_id"], role="sophia", emotion=type("E", (), result["sophia_emotion"])())
-            except Exception as e:
-                logger.warning(f"Failed to persist sophia emotion: {e}")
-        except Exception as e:
-            logger.warning(f"Failed to persist text conversation session: {e}")
+        persist_conversation(
+            result["session_id"],
+            transcript=result["transcript"],
+            reply=result["reply"],
+            user_emotion=result["user_emotion"],
+            sophia_emotion=result["sophia_emotion"],
+            audio_url=result["audio_url"],
+            intent=result["intent"],
+            context_memory=orjson.dumps(result["context_memory"]).decode(),
+        )
         
         return DefiChatResponse(**result)
         
@@ -845,10 +1052,9 @@ async def text_chat_stream(
     """
     async def event_generator():
         try:
-            import json as _json
             # Stream LLM tokens
             reply_accum = []
-            for chunk in stream_generate_llm_reply(body.message):
+            async for chunk in stream_generate_llm_reply_async(body.message):
                 if not chunk:
                     continue
                 reply_accum.append(chunk)
@@ -856,26 +1062,30 @@ async def text_chat_stream(
                 yield f"event: token\ndata: {safe_chunk}\n\n"
 
             reply = "".join(reply_accum).strip()
-            yield f"event: reply_done\ndata: {{\"reply\": { _json.dumps(reply) }}}\n\n"
+            yield f"event: reply_done\ndata: {orjson.dumps({'reply': reply}).decode()}\n\n"
 
             # Optional TTS synthesis and audio URL
             audio_url = ""
             sophia_emotion = None
             mock_audio = False
             try:
-                audio_bytes = synthesize_inworld(reply)
-                file_name = f"sophia_{int(time.time()*1000)}.mp3"
-                audio_url = upload_audio_and_get_url(audio_bytes, file_name)
+                audio_bytes = await synthesize_inworld_async(reply)
+                file_name = audio_file_name()
+                digest = audio_digest(audio_bytes)
+                # Sophia's emotion only needs the audio bytes; analyze while uploading
+                audio_url, sophia_emotion = await asyncio.gather(
+                    _run_in(_upload_pool, upload_audio_and_get_url, audio_bytes, file_name, digest),
+                    _run_in(_emotion_pool, analyze_emotion_audio, audio_bytes, digest),
+                )
                 try:
                     mock_audio = audio_bytes.startswith(b"ID3mock") or len(audio_bytes) < 2048
                 except Exception:
                     mock_audio = False
-                sophia_emotion = analyze_emotion_audio(audio_bytes)
             except Exception:
                 logger.exception("Synthesis or upload failed in text_chat_stream")
 
             payload = {"audio_url": audio_url, "sophia_emotion": (sophia_emotion.model_dump() if sophia_emotion else None), "mock_audio": mock_audio}
-            yield f"event: audio_url\ndata: {_json.dumps(payload)}\n\n"
+            yield f"event: audio_url\ndata: {orjson.dumps(payload).decode()}\n\n"
 
         except Exception as e:
             logger.exception("Streaming text chat failed")
@@ -903,7 +1113,6 @@ async def get_memory(
 ):
     """Get conversation memory for a session"""
     try:
-        from app.services.memory import memory_manager
         context = memory_manager.get_context_for_llm(session_id)
         
         return {
@@ -924,8 +1133,6 @@ async def force_evaluate_conversation(
 ):
     """Force evaluation of a specific conversation"""
     try:
-        from app.services.evaluations import evaluation_manager
-        
         report = evaluation_manager.force_evaluate_conversation(session_id)
         
         if report is None:
@@ -958,8 +1165,6 @@ async def get_evaluation_status(
 ):
     """Get current evaluation system status"""
     try:
-        from app.services.evaluations import evaluation_manager
-        
         active_count = evaluation_manager.get_active_conversation_count()
         
         # Get status of all active conversations
@@ -987,8 +1192,6 @@ async def check_finished_conversations(
 ):
     """Manually check for and evaluate finished conversations"""
     try:
-        from app.services.evaluations import evaluation_manager
-        
         reports = evaluation_manager.check_and_evaluate_finished_conversations()
         
         evaluation_summaries = []
@@ -1016,9 +1219,26 @@ async def check_finished_conversations(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0", 
-        port=8000, 
-        reload=True
-    )
\ No newline at end of file
+    if os.getenv("APP_ENV", "dev") == "dev":
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0", 
+            port=8000, 
+            reload=True
+        )
+    else:
+        # uvloop/httptools ship with uvicorn[standard]. Each worker keeps its own
+        # in-memory rate-limit counters unless RATE_LIMIT_STORAGE_URI points at Redis.
+        # Keep-alive outlives the platform proxy's idle timeout (uvicorn's 5s
+        # default is shorter), so follow-up turns reuse the connection instead
+        # of racing a server-side close.
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=int(os.getenv("PORT", "8000")),
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            loop="uvloop",
+            http="httptools",
+            timeout_keep_alive=int(os.getenv("KEEP_ALIVE_TIMEOUT_S", "75")),
+            log_level="warning",
+        )
\ No newline at end of file
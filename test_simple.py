@@ -23,7 +23,7 @@ def test_imports():
     print("=" * 40)
     
     try:
-        from app.services.rag import rag_system
+        from app.services.rag import get_rag_system
         print("   RAG system: PASS")
         
         from app.services.memory import memory_manager  
@@ -50,7 +50,8 @@ def test_rag_system():
     print("=" * 40)
     
     try:
-        from app.services.rag import rag_system
+        from app.services.rag import get_rag_system
+        rag_system = get_rag_system()
         
         # Test query
         results = rag_system.query_faqs("What is staking?", top_k=2)
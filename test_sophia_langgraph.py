@@ -23,7 +23,7 @@ sys.path.insert(0, str(project_root))
 
 from app.services.langgraph_service import langgraph_service
 from app.services.evaluations import evaluation_manager
-from app.services.rag import rag_system
+from app.services.rag import get_rag_system
 from app.services.memory import memory_manager
 
 # Configure logging
@@ -126,6 +126,7 @@ def test_rag_system():
     print("=" * 50)
     
     try:
+        rag_system = get_rag_system()
         # Test queries
         test_queries = [
             "What is staking?",
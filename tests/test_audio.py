@@ -0,0 +1,34 @@
+import io
+import shutil
+
+import pytest
+
+from app.services.audio import split_on_pauses
+
+pydub = pytest.importorskip("pydub")
+if shutil.which("ffmpeg") is None:
+    pytest.skip("ffmpeg is required to decode uploads", allow_module_level=True)
+
+from pydub import AudioSegment  # noqa: E402
+from pydub.generators import Sine  # noqa: E402
+
+
+def _wav(clip):
+    buf = io.BytesIO()
+    clip.export(buf, format="wav")
+    return buf.getvalue()
+
+
+def test_split_cuts_at_the_pause_nearest_the_target():
+    speech = Sine(440).to_audio_segment(duration=25_000)
+    clip = speech + AudioSegment.silent(duration=1_000) + speech
+    segments = [AudioSegment.from_file(io.BytesIO(s)) for s in split_on_pauses(_wav(clip), 30_000)]
+    assert len(segments) == 2
+    # Cut lands mid-pause (25.5s), not at the 30s target inside the tone
+    assert abs(len(segments[0]) - 25_500) <= 50
+    assert abs(sum(len(s) for s in segments) - len(clip)) <= 50
+
+
+def test_short_clip_is_returned_unchanged():
+    wav = _wav(Sine(440).to_audio_segment(duration=40_000))
+    assert split_on_pauses(wav, 30_000) == [wav]
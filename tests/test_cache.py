@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.cache import SemanticCache, SingleFlight, TTLCache
+
+_VOCAB = ["apy", "apr", "staking", "gas", "swap"]
+
+
+def _encode(text):
+    # Bag-of-words over a tiny vocabulary, L2-normalized like the RAG encoder
+    vec = np.array([text.lower().split().count(w) for w in _VOCAB], dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    c = _Clock()
+    with patch("app.services.cache.time", c):
+        yield c
+
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache(maxsize=4, ttl_s=10)
+    cache.put("k", "v")
+    clock.now += 9
+    assert cache.get("k") == "v"
+    clock.now += 2
+    assert cache.get("k") is None
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl_s=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_semantic_cache_threshold(clock):
+    cache = SemanticCache(_encode, maxsize=4, ttl_s=10, threshold=0.9)
+    cache.put("apy staking", "reply")
+    assert cache.get("staking apy") == "reply"  # same words, cosine 1.0
+    assert cache.get("apy gas") is None  # cosine 0.5
+
+
+def test_semantic_cache_skips_expired_best_match(clock):
+    cache = SemanticCache(_encode, maxsize=4, ttl_s=10, threshold=0.5)
+    cache.put("apy", "old")
+    clock.now += 5
+    cache.put("apy staking", "fresh")
+    clock.now += 6  # "old" expired; "fresh" is a weaker but live match
+    assert cache.get("apy") == "fresh"
+    clock.now += 5
+    assert cache.get("apy") is None
+
+
+def test_single_flight_runs_once_per_key():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "text"
+
+    async def main():
+        return await asyncio.gather(*(flight.run("k", fetch) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["text"] * 3
+    assert len(calls) == 1
+
+
+def test_single_flight_propagates_exceptions_to_all_waiters():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flight.run("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_single_flight_keeps_event_loops_apart():
+    flight = SingleFlight()
+    loop_a, loop_b = asyncio.new_event_loop(), asyncio.new_event_loop()
+
+    async def fetch(tag):
+        await asyncio.sleep(0.01)
+        return tag
+
+    try:
+        # Leave a call in flight on loop A, then run the same key on loop B
+        pending = loop_a.create_task(flight.run("k", lambda: fetch("a")))
+        loop_a.run_until_complete(asyncio.sleep(0))
+        assert loop_b.run_until_complete(flight.run("k", lambda: fetch("b"))) == "b"
+        assert loop_a.run_until_complete(pending) == "a"
+    finally:
+        loop_a.close()
+        loop_b.close()
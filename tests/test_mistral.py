@@ -0,0 +1,161 @@
+import asyncio
+import io
+import time
+import wave
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.services import mistral
+from app.services.cache import SemanticCache, TTLCache
+
+WAV = b"RIFF....WAVEfmt "  # fake wav
+WAV_B64 = "UklGRi4uLi5XQVZFZm10IA=="
+TOKENS = ["APY ", "is the ", "yearly yield."]
+
+
+def _stub_client():
+    client = MagicMock()
+    client.chat.complete.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="".join(TOKENS)))]
+    )
+    client.chat.stream.return_value = [
+        SimpleNamespace(data=SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=tok))]))
+        for tok in TOKENS
+    ]
+    return client
+
+
+@patch("app.services.mistral.transcribe_audio_with_voxtral")
+def test_reply_from_audio_uses_voxtral_directly(mock_stt):
+    client = _stub_client()
+    with patch("app.services.mistral._client", return_value=client):
+        reply = mistral.generate_reply_from_audio(WAV)
+    assert reply == "APY is the yearly yield."
+    content = client.chat.complete.call_args.kwargs["messages"][0]["content"]
+    assert content[0] == {"type": "input_audio", "input_audio": WAV_B64}
+    mock_stt.assert_not_called()
+
+
+@patch("app.services.mistral.transcribe_audio_with_voxtral")
+def test_stream_reply_from_audio_uses_voxtral_directly(mock_stt):
+    client = _stub_client()
+    with patch("app.services.mistral._client", return_value=client), \
+            patch("app.services.mistral._delta_text", mistral._delta_text_v1):
+        text = "".join(mistral.stream_generate_reply_from_audio(WAV))
+    assert text == "APY is the yearly yield."
+    content = client.chat.stream.call_args.kwargs["messages"][0]["content"]
+    assert content[0] == {"type": "input_audio", "input_audio": WAV_B64}
+    mock_stt.assert_not_called()
+
+
+def test_semantic_reply_cache_is_scoped_to_context():
+    semantic = SemanticCache(lambda text: np.ones(2, dtype=np.float32) / np.sqrt(2), maxsize=4, ttl_s=60, threshold=0.9)
+    with patch("app.services.mistral._semantic_reply_cache", return_value=semantic), \
+            patch("app.services.mistral._reply_cache", TTLCache(maxsize=4, ttl_s=60)):
+        scope = mistral._cache_scope("defi_question|neutral|")
+        mistral._store_reply("what is apy", "APY is yearly yield.", scope=scope)
+        assert mistral._lookup_reply("whats apy", scope=scope) == "APY is yearly yield."
+        other = mistral._cache_scope("defi_question|negative|")
+        assert mistral._lookup_reply("whats apy", scope=other) is None
+        # Neither the stored key nor the key promoted from the semantic hit leaks across scopes
+        assert mistral._lookup_reply("what is apy", scope=other) is None
+
+
+def test_concurrent_identical_clips_share_one_transcription():
+    client = MagicMock()
+
+    async def complete_async(**kwargs):
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(text="What is APY?")
+
+    client.audio.transcriptions.complete_async.side_effect = complete_async
+
+    async def main():
+        return await asyncio.gather(*(mistral.transcribe_audio_with_voxtral_async(WAV) for _ in range(3)))
+
+    with patch("app.services.mistral._client", return_value=client), \
+            patch("app.services.mistral._transcript_cache", TTLCache(maxsize=4, ttl_s=60)):
+        assert asyncio.run(main()) == ["What is APY?"] * 3
+        # A second event loop (e.g. another TestClient) gets its own call, not a foreign future
+        with patch("app.services.mistral._transcript_cache", TTLCache(maxsize=4, ttl_s=60)):
+            assert asyncio.run(main()) == ["What is APY?"] * 3
+    assert client.audio.transcriptions.complete_async.call_count == 2
+
+
+def test_long_clip_segments_are_transcribed_and_joined_in_order():
+    long_clip = b"\0" * mistral._segment_min_bytes(30)
+    transcripts = {b"seg1": "What is ", b"seg2": "", b"seg3": " staking? "}
+
+    async def fake_stt(seg):
+        return transcripts[seg]
+
+    async def fake_split(wav_bytes, segment_ms):
+        assert segment_ms == 30_000
+        return [b"seg1", b"seg2", b"seg3"]
+
+    with patch.object(mistral.get_settings(), "STT_SEGMENT_SECONDS", 30), \
+            patch("app.services.mistral._split_in_pool", side_effect=fake_split), \
+            patch("app.services.mistral.transcribe_audio_with_voxtral_async", side_effect=fake_stt), \
+            patch("app.services.mistral._transcript_cache", TTLCache(maxsize=4, ttl_s=60)) as cache:
+        assert asyncio.run(mistral.transcribe_long_audio_async(long_clip)) == "What is staking?"
+        assert cache.get(mistral.audio_digest(long_clip)) == "What is staking?"
+
+
+def test_split_threshold_follows_segment_length():
+    assert mistral._segment_min_bytes(60) == 2 * mistral._segment_min_bytes(30)
+
+
+def _pcm_wav(seconds, rate=16_000):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\0\0" * int(seconds * rate))
+    return buf.getvalue()
+
+
+def test_short_wav_skips_the_split_pool_despite_its_size():
+    clip = _pcm_wav(10)  # 320 KB, well over the compressed-audio byte gate
+    assert len(clip) > mistral._segment_min_bytes(30)
+
+    async def fake_stt(wav_bytes, digest=None):
+        assert digest == mistral.audio_digest(clip)
+        return "What is APY?"
+
+    with patch.object(mistral.get_settings(), "STT_SEGMENT_SECONDS", 30), \
+            patch("app.services.mistral._split_in_pool") as split, \
+            patch("app.services.mistral.transcribe_audio_with_voxtral_async", side_effect=fake_stt):
+        assert asyncio.run(mistral.transcribe_long_audio_async(clip)) == "What is APY?"
+    split.assert_not_called()
+
+
+def test_split_gate_uses_wav_duration():
+    assert not mistral._may_need_split(_pcm_wav(44, rate=8_000), 30)
+    assert mistral._may_need_split(_pcm_wav(46, rate=8_000), 30)
+
+
+def test_async_coalesce_flushes_when_the_next_delta_is_late():
+    async def deltas():
+        yield "APY "
+        yield "is "
+        await asyncio.sleep(0.3)  # model stalls well past the window
+        yield "yearly yield."
+
+    async def main():
+        start = time.monotonic()
+        return [(chunk, time.monotonic() - start) async for chunk in mistral._acoalesce(deltas())]
+
+    chunks = asyncio.run(main())
+    assert "".join(c for c, _ in chunks) == "APY is yearly yield."
+    # The buffered text went out on the window timer, not with the late delta
+    assert chunks[0][0] == "APY is " and chunks[0][1] < 0.2
+
+
+def test_streaming_fallback_matches_the_non_streaming_reply():
+    client = MagicMock()
+    client.chat.stream.side_effect = RuntimeError("mistral down")
+    with patch("app.services.mistral._client", return_value=client):
+        assert "".join(mistral.stream_generate_llm_reply("Is staking safe?")) == mistral._rule_based_reply("Is staking safe?")